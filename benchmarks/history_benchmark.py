@@ -0,0 +1,112 @@
+"""Memory/time benchmark for tool-result history in a 20-step Agent.run.
+
+Compares the previous approach (stringify each result up front and re-join the
+whole history for every LLM call) with structured ToolRecords held in a
+RunHistory (serialize each result once, memoize the message list per step).
+No network or LLM calls are made: each step "fetches" a synthetic Alpha Vantage
+TIME_SERIES_DAILY payload with ``outputsize=full`` and the LLM calls are replaced
+by the prompt assembly they would trigger. Payloads are built inside each run, so
+the peak memory includes whatever form of them the approach keeps alive.
+
+Usage:
+    python benchmarks/history_benchmark.py [--steps 20] [--bars 5000]
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from tafin.session import RunHistory, Session
+
+
+def alpha_vantage_payload(symbol: str, bars: int) -> Dict[str, Any]:
+    start = date(2000, 1, 3)
+    series = {}
+    for index in range(bars):
+        price = 100 + (index % 250) * 0.37
+        series[(start + timedelta(days=index)).isoformat()] = {
+            "1. open": f"{price:.4f}",
+            "2. high": f"{price * 1.01:.4f}",
+            "3. low": f"{price * 0.99:.4f}",
+            "4. close": f"{price * 1.002:.4f}",
+            "5. volume": str(1_000_000 + index * 17),
+        }
+    return {
+        "Meta Data": {"1. Information": "Daily Prices", "2. Symbol": symbol, "4. Output Size": "Full size"},
+        "Time Series (Daily)": series,
+    }
+
+
+Steps = Callable[[], Iterator[Tuple[Dict[str, Any], Dict[str, Any]]]]
+
+
+def legacy_run(steps: Steps) -> int:
+    """The previous Agent.run: eager f-strings plus a fresh join for every LLM call."""
+    session_outputs: List[str] = []
+    prompt_chars = 0
+    for args, payload in steps():
+        preview = f"{payload}"[:100]  # logger.log_tool_run(tool_name, f"{result}")
+        session_outputs.append(f"Output of alpha_vantage_query with args {args}: {payload}")
+        prompt_chars += len("\n".join(session_outputs))  # ask_for_actions(last_outputs=...)
+        prompt_chars += len("\n".join(session_outputs))  # ask_if_done(..., "\n".join(...))
+        del preview, payload
+    prompt_chars += len("\n\n".join(session_outputs))  # _generate_answer
+    return prompt_chars
+
+
+def structured_run(steps: Steps) -> int:
+    """The current Agent.run: ToolRecords serialized once, messages memoized per step."""
+    session = Session(max_bytes=10**10)
+    history = RunHistory(session.context())
+    prompt_chars = 0
+    for args, payload in steps():
+        record = session.put("alpha_vantage_query", args, payload)
+        preview = record.preview()
+        history.add(record)
+        prompt_chars += sum(len(message.content) for message in history.messages())  # ask_for_actions
+        prompt_chars += sum(len(message.content) for message in history.messages())  # ask_if_done
+        del preview, payload
+    prompt_chars += sum(len(message.content) for message in history.messages())  # _generate_answer
+    return prompt_chars
+
+
+def measure(run: Callable[[Steps], int], steps: Steps) -> Tuple[float, int, int]:
+    # Time without tracing (tracemalloc slows every allocation), then trace for peak memory.
+    gc.collect()
+    started = time.perf_counter()
+    prompt_chars = run(steps)
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    tracemalloc.start()
+    run(steps)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, prompt_chars
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--steps", type=int, default=20)
+    parser.add_argument("--bars", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    options = parser.parse_args()
+
+    symbols = [f"SYM{index}" for index in range(options.steps)]
+
+    def steps():
+        for symbol in symbols:
+            yield {"function": "TIME_SERIES_DAILY", "symbol": symbol, "outputsize": "full"}, alpha_vantage_payload(symbol, options.bars)
+
+    print(f"{options.steps} steps, {options.bars} daily bars per payload, best of {options.repeat}")
+    for name, run in (("legacy (eager str + join)", legacy_run), ("structured (RunHistory)", structured_run)):
+        results = [measure(run, steps) for _ in range(options.repeat)]
+        elapsed = min(result[0] for result in results)
+        peak = min(result[1] for result in results)
+        prompt_chars = results[0][2]
+        print(f"  {name:<26} time={elapsed * 1000:8.1f} ms  peak={peak / 2**20:7.1f} MiB  prompt chars={prompt_chars:,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,10 @@
-from typing import List
+import os
+from typing import List, Optional, Sequence
 
-from langchain_core.messages import AIMessage
+from langchain_core.messages import AIMessage, BaseMessage
 
-from tafin.model import LLMUnavailableError, call_llm
+from tafin.model import LLMUnavailableError, call_llm, usage_tracker
+from tafin.plan_cache import PlanCache, depends_on_context
 from tafin.prompts import (
     ACTION_SYSTEM_PROMPT,
     ANSWER_SYSTEM_PROMPT,
@@ -10,34 +12,63 @@ from tafin.prompts import (
     VALIDATION_SYSTEM_PROMPT,
 )
 from tafin.schemas import Answer, IsDone, Task, TaskList
+from tafin.session import RunHistory, Session
 from tafin.tools import TOOLS
+from tafin.utils.deadline import Deadline, DeadlineExceeded
 from tafin.utils.logger import Logger
 from tafin.utils.ui import show_progress
 
 
 class Agent:
-    def __init__(self, max_steps: int = 20, max_steps_per_task: int = 5):
+    def __init__(
+        self,
+        max_steps: int = 20,
+        max_steps_per_task: int = 5,
+        query_timeout: Optional[float] = 120.0,
+        answer_timeout: float = 30.0,
+        use_plan_cache: bool = True,
+        session: Optional[Session] = None,
+    ):
         self.logger = Logger()
         self.max_steps = max_steps
         self.max_steps_per_task = max_steps_per_task
+        self.query_timeout = query_timeout
+        self.answer_timeout = answer_timeout
+        self._deadline = Deadline()
+        self.plan_cache = PlanCache() if use_plan_cache else None
+        self.session = session if session is not None else Session()
 
     # ---------- task planning ----------
     @show_progress("Planning tasks...", "Tasks planned")
     def plan_tasks(self, query: str) -> List[Task]:
+        # Follow-ups are planned with the earlier turns and bypass the plan cache. Stand-alone
+        # queries are planned without them, so a cached plan never carries another turn's details.
+        conversation = self.session.conversation() if depends_on_context(query) else ""
+        plan_cache = self.plan_cache if not conversation else None
+        cached = plan_cache.get(query) if plan_cache else None
+        if cached is not None:
+            self.logger.log_task_list([task.dict() for task in cached])
+            return cached
+
         tool_descriptions = "\n".join([f"- {t.name}: {t.description}" for t in TOOLS])
+        earlier = f"Earlier in this session:\n{conversation}\n" if conversation else ""
         prompt = f"""
+        {earlier}
         Given the user query: "{query}",
         Create a list of tasks to be completed.
+        Data already fetched earlier in the session will be reused, so do not plan to fetch it again.
         Example: {{"tasks": [{{"id": 1, "description": "some task", "done": false}}]}}
         """
         system_prompt = PLANNING_SYSTEM_PROMPT.format(tools=tool_descriptions)
         try:
-            response = call_llm(prompt, system_prompt=system_prompt, output_schema=TaskList)
+            response = self._deadline.run(call_llm, prompt, system_prompt=system_prompt, output_schema=TaskList, label="plan")
             tasks = response.tasks
-        except LLMUnavailableError:
+            if plan_cache:
+                plan_cache.put(query, tasks)
+        except (LLMUnavailableError, DeadlineExceeded):
             raise
         except Exception as exc:
-            self.logger._log(f"Planning failed: {exc}")
+            self.logger.log_error(f"Planning failed: {exc}")
             tasks = [Task(id=1, description=query, done=False)]
 
         self.logger.log_task_list([task.dict() for task in tasks])
@@ -45,36 +76,37 @@ class Agent:
 
     # ---------- ask LLM what to do ----------
     @show_progress("Thinking...", "")
-    def ask_for_actions(self, task_desc: str, last_outputs: str = "") -> AIMessage:
+    def ask_for_actions(self, task_desc: str, history: Optional[Sequence[BaseMessage]] = None) -> AIMessage:
         prompt = f"""
         We are working on: "{task_desc}".
-        Here is a history of tool outputs from the session so far: {last_outputs}
+        The tool outputs from the session so far are in the messages above.
 
         Based on the task and the outputs, what should be the next step?
         """
         try:
-            return call_llm(prompt, system_prompt=ACTION_SYSTEM_PROMPT, tools=TOOLS)
-        except LLMUnavailableError:
+            return self._deadline.run(call_llm, prompt, system_prompt=ACTION_SYSTEM_PROMPT, tools=TOOLS, history=history, label="action")
+        except (LLMUnavailableError, DeadlineExceeded):
             raise
         except Exception as exc:
-            self.logger._log(f"ask_for_actions failed: {exc}")
+            self.logger.log_error(f"ask_for_actions failed: {exc}")
             return AIMessage(content="Failed to get actions.")
 
     # ---------- ask LLM if task is done ----------
     @show_progress("Validating...", "")
-    def ask_if_done(self, task_desc: str, recent_results: str) -> bool:
+    def ask_if_done(self, task_desc: str, history: Optional[Sequence[BaseMessage]] = None) -> bool:
         prompt = f"""
         We were trying to complete the task: "{task_desc}".
-        Here is a history of tool outputs from the session so far: {recent_results}
+        The tool outputs from the session so far are in the messages above.
 
         Is the task done?
         """
         try:
-            resp = call_llm(prompt, system_prompt=VALIDATION_SYSTEM_PROMPT, output_schema=IsDone)
+            resp = self._deadline.run(call_llm, prompt, system_prompt=VALIDATION_SYSTEM_PROMPT, output_schema=IsDone, history=history, label="validate")
             return resp.done
-        except LLMUnavailableError:
+        except (LLMUnavailableError, DeadlineExceeded):
             raise
-        except Exception:
+        except Exception as exc:
+            self.logger.log_error(f"ask_if_done failed: {exc}")
             return False
 
     # ---------- tool execution ----------
@@ -83,7 +115,7 @@ class Agent:
 
         @show_progress(f"Executing {tool_name}...", "")
         def run_tool():
-            return tool.run(inp_args)
+            return self._deadline.run(tool.run, inp_args)
 
         return run_tool()
 
@@ -96,89 +128,130 @@ class Agent:
     def run(self, query: str):
         step_count = 0
         last_actions: List[str] = []
-        session_outputs: List[str] = []
-
-        tasks = self.plan_tasks(query)
-        if not tasks:
-            answer = self._generate_answer(query, session_outputs)
-            self.logger.log_summary(answer)
-            return answer
+        # Earlier turns and their tool outputs come first so follow-ups can build on them.
+        history = RunHistory(self.session.context())
+        usage_tracker.reset()
 
-        while any(not task.done for task in tasks):
-            if step_count >= self.max_steps:
-                self.logger._log("Global max steps reached - aborting to avoid runaway loop.")
-                break
+        self._deadline = Deadline(self.query_timeout)
+        partial = False
 
-            task = next(task for task in tasks if not task.done)
-            self.logger.log_task_start(task.description)
+        try:
+            tasks = self.plan_tasks(query)
 
-            per_task_steps = 0
-            while per_task_steps < self.max_steps_per_task:
+            while any(not task.done for task in tasks):
                 if step_count >= self.max_steps:
-                    self.logger._log("Global max steps reached - stopping.")
-                    return
-
-                ai_message = self.ask_for_actions(task.description, last_outputs="\n".join(session_outputs))
-
-                if not getattr(ai_message, "tool_calls", None):
-                    task.done = True
-                    self.logger.log_task_done(task.description)
+                    self.logger._log("Global max steps reached - aborting to avoid runaway loop.")
                     break
 
-                for tool_call in ai_message.tool_calls:
+                self._deadline.check()
+                task = next(task for task in tasks if not task.done)
+                self.logger.log_task_start(task.description)
+
+                per_task_steps = 0
+                while per_task_steps < self.max_steps_per_task:
                     if step_count >= self.max_steps:
+                        self.logger._log("Global max steps reached - stopping.")
+                        return
+
+                    self._deadline.check()
+                    ai_message = self.ask_for_actions(task.description, history=history.messages())
+
+                    if not getattr(ai_message, "tool_calls", None):
+                        task.done = True
+                        self.logger.log_task_done(task.description)
                         break
 
-                    tool_name = tool_call["name"]
-                    inp_args = tool_call["args"]
-                    action_sig = f"{tool_name}:{inp_args}"
+                    for tool_call in ai_message.tool_calls:
+                        if step_count >= self.max_steps:
+                            break
 
-                    last_actions.append(action_sig)
-                    if len(last_actions) > 4:
-                        last_actions = last_actions[-4:]
-                    if len(last_actions) == 4 and len(set(last_actions)) == 1:
-                        self.logger._log("Detected repeating action - aborting to avoid loop.")
-                        return
+                        tool_name = tool_call["name"]
+                        inp_args = tool_call["args"]
+                        action_sig = f"{tool_name}:{inp_args}"
 
-                    tool_to_run = next((tool for tool in TOOLS if tool.name == tool_name), None)
-                    if tool_to_run and self.confirm_action(tool_name, str(inp_args)):
-                        try:
-                            result = self._execute_tool(tool_to_run, tool_name, inp_args)
-                            self.logger.log_tool_run(tool_name, f"{result}")
-                            session_outputs.append(f"Output of {tool_name} with args {inp_args}: {result}")
-                        except Exception as exc:
-                            self.logger._log(f"Tool execution failed: {exc}")
-                            session_outputs.append(f"Error from {tool_name} with args {inp_args}: {exc}")
-                    else:
-                        self.logger._log(f"Invalid tool: {tool_name}")
-
-                    step_count += 1
-                    per_task_steps += 1
-
-                if self.ask_if_done(task.description, "\n".join(session_outputs)):
-                    task.done = True
-                    self.logger.log_task_done(task.description)
-                    break
+                        last_actions.append(action_sig)
+                        if len(last_actions) > 4:
+                            last_actions = last_actions[-4:]
+                        if len(last_actions) == 4 and len(set(last_actions)) == 1:
+                            self.logger._log("Detected repeating action - aborting to avoid loop.")
+                            return
+
+                        tool_to_run = next((tool for tool in TOOLS if tool.name == tool_name), None)
+                        if tool_to_run and self.confirm_action(tool_name, str(inp_args)):
+                            record = self.session.get(tool_name, inp_args)
+                            try:
+                                if record is not None:
+                                    self.logger.log_tool_run(f"{tool_name} (reused)", record.preview(), record.size, args=inp_args)
+                                else:
+                                    result = self._execute_tool(tool_to_run, tool_name, inp_args)
+                                    record = self.session.put(tool_name, inp_args, result)
+                                    self.logger.log_tool_run(tool_name, record.preview(), record.size, args=inp_args)
+                                history.add(record)
+                            except DeadlineExceeded:
+                                raise
+                            except Exception as exc:
+                                self.logger.log_error(f"Tool execution failed: {exc}", tool=tool_name, args=inp_args)
+                                history.add(f"Error from {tool_name} with args {inp_args}: {exc}")
+                        else:
+                            self.logger.log_error("Invalid tool", tool=tool_name, args=inp_args)
+
+                        step_count += 1
+                        per_task_steps += 1
 
-        answer = self._generate_answer(query, session_outputs)
+                    if self.ask_if_done(task.description, history=history.messages()):
+                        task.done = True
+                        self.logger.log_task_done(task.description)
+                        break
+        except DeadlineExceeded:
+            self.logger._log("Time limit reached - answering with the data collected so far.")
+            partial = True
+
+        answer = self._generate_answer(query, history.messages(), partial=partial)
+        self.session.add_turn(query, answer)
         self.logger.log_summary(answer)
+        self._report_usage()
         return answer
 
+    # ---------- prompt cache instrumentation ----------
+    def _report_usage(self):
+        """Print per-call token usage, including cached prompt tokens, when enabled."""
+        if os.getenv("TAFIN_SHOW_USAGE"):
+            self.logger.log_usage(usage_tracker.calls, usage_tracker.summary())
+            if self.plan_cache:
+                stats = self.plan_cache.stats()
+                self.logger.log_info(
+                    f"Plan cache: {stats['hits']} hits, {stats['misses']} misses "
+                    f"({stats['hit_rate']:.0%} hit rate), {stats['entries']} templates"
+                )
+
     # ---------- answer generation ----------
     @show_progress("Generating answer...", "Answer ready")
-    def _generate_answer(self, query: str, session_outputs: List[str]) -> str:
-        all_results = "\n\n".join(session_outputs) if session_outputs else "No data was collected."
+    def _generate_answer(self, query: str, history: Sequence[BaseMessage], partial: bool = False) -> str:
+        history = history if history else ["No data was collected."]
+        partial_note = (
+            "Research was stopped early because the time limit was reached, so the data may be incomplete. "
+            "Answer with what is available and briefly say what is missing."
+            if partial
+            else ""
+        )
         answer_prompt = f"""
         Original user query: "{query}"
 
-        Data and results collected from tools:
-        {all_results}
-
-        Based on the data above, provide a comprehensive answer to the user's query.
+        The data and results collected from tools are in the messages above.
+        Based on that data, provide a comprehensive answer to the user's query.
         Include specific numbers, calculations, and insights.
+        {partial_note}
         """
+        # The answer always gets at least answer_timeout seconds, even once the query budget is spent.
+        remaining = self._deadline.remaining()
+        deadline = Deadline(None if remaining is None else max(remaining, self.answer_timeout))
         try:
-            answer_obj = call_llm(answer_prompt, system_prompt=ANSWER_SYSTEM_PROMPT, output_schema=Answer)
-            return answer_obj.answer
+            answer_obj = deadline.run(call_llm, answer_prompt, system_prompt=ANSWER_SYSTEM_PROMPT, output_schema=Answer, history=history, label="answer")
+            answer = answer_obj.answer
         except LLMUnavailableError:
             raise
+        except DeadlineExceeded:
+            answer = "The time limit was reached before an answer could be generated."
+        if partial:
+            answer = f"[Partial answer - time limit reached before research finished]\n{answer}"
+        return answer
@@ -5,7 +5,8 @@ load_dotenv()
 
 from tafin.agent import Agent
 from tafin.model import LLMUnavailableError, OPENAI_API_KEY
-from tafin.tools import run_alpha_vantage, run_web_search
+from tafin.screener import METRICS
+from tafin.tools import run_alpha_vantage, run_screener, run_web_search, run_web_search_batch
 from tafin.utils.intro import print_intro
 from prompt_toolkit import PromptSession
 from prompt_toolkit.history import InMemoryHistory
@@ -14,11 +15,35 @@ SEARCH_HELP = (
     "Search mode commands:\n"
     "  ?help                Show this message\n"
     "  alpha <symbol> [fn]  Call Alpha Vantage (fn defaults to TIME_SERIES_DAILY)\n"
+    "  /screener <criteria> Screen the coverage universe (e.g. revenue_growth > 0.1 and fcf_margin > 0.15)\n"
+    "  q1; q2; ...          Runs several searches in one batch, deduplicated by URL\n"
     "  <anything else>      Runs a Serper web search\n"
     "  exit / quit          Leave TAFIN\n"
 )
 
 
+def run_screener_command(raw: str):
+    """Handle `/screener <criteria>` from either REPL."""
+    criteria = raw[len("/screener"):].strip()
+    if not criteria:
+        print("Usage: /screener <criteria>")
+        print(f"Available metrics: {', '.join(METRICS)}\n")
+        return
+    try:
+        result = run_screener(criteria=criteria)
+    except Exception as exc:
+        print(f"Screener error: {exc}")
+        return
+
+    print(f"\n{result['match_count']} of {result['universe_size']} tickers match: {criteria}")
+    for row in result["matches"]:
+        metrics = ", ".join(f"{key}={value}" for key, value in row.items() if key != "ticker")
+        print(f"  {row['ticker']:<8} {metrics}")
+    if result["missing"]:
+        print(f"No data for: {', '.join(result['missing'])}")
+    print()
+
+
 def run_search_mode(reason: str = ""):
     """Fallback mode when no OpenAI key is configured or authentication fails."""
     if reason:
@@ -45,6 +70,10 @@ def run_search_mode(reason: str = ""):
             print(SEARCH_HELP)
             continue
 
+        if lowered.startswith("/screener"):
+            run_screener_command(raw)
+            continue
+
         if lowered.startswith("alpha "):
             parts = raw.split()
             if len(parts) < 2:
@@ -63,8 +92,12 @@ def run_search_mode(reason: str = ""):
             print()
             continue
 
+        queries = [part.strip() for part in raw.split(";") if part.strip()]
         try:
-            result = run_web_search(query=raw)
+            if len(queries) > 1:
+                result = run_web_search_batch(queries=queries)
+            else:
+                result = run_web_search(query=raw)
         except Exception as exc:
             print(f"Search error: {exc}")
             continue
@@ -93,17 +126,32 @@ def main():
     while True:
         try:
             query = session.prompt("tafin> ")
-            if query.lower() in ["exit", "quit"]:
-                print("Goodbye!")
-                break
-            if query:
+        except (KeyboardInterrupt, EOFError):
+            print("\nGoodbye!")
+            break
+        if query.lower() in ["exit", "quit"]:
+            print("Goodbye!")
+            break
+        if not query:
+            continue
+        if query.strip().lower() == "/reset":
+            agent.session.clear()
+            print("Session cleared.")
+            continue
+        try:
+            if query.lower().startswith("/screener"):
+                run_screener_command(query)
+            else:
                 agent.run(query)
         except LLMUnavailableError as exc:
             run_search_mode(str(exc))
             break
-        except (KeyboardInterrupt, EOFError):
-            print("\nGoodbye!")
-            break
+        except KeyboardInterrupt:
+            # Ctrl-C aborts only the running query; the session stays open.
+            print("\nQuery cancelled.")
+        finally:
+            # Let the background log renderer catch up before showing the prompt again.
+            agent.logger.flush()
 
 
 if __name__ == "__main__":
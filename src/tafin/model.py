@@ -1,12 +1,14 @@
 import os
+import time
+from dataclasses import dataclass
 from langchain_openai import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate
 from pydantic import BaseModel
-from typing import Type, List, Optional
+from typing import Any, Dict, Type, List, Optional, Sequence, Union
 from langchain_core.tools import BaseTool
-from langchain_core.messages import AIMessage
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
 
 from tafin.prompts import DEFAULT_SYSTEM_PROMPT
+from tafin.utils.deadline import check_cancelled, request_timeout
 
 
 class LLMUnavailableError(RuntimeError):
@@ -18,6 +20,56 @@ OPENAI_API_KEY = os.getenv("TAFIN_OPENAI_API_KEY") or os.getenv("OPENAI_API_KEY"
 _llm: Optional[ChatOpenAI] = None
 
 
+@dataclass
+class LLMUsage:
+    """Token accounting for a single LLM call."""
+    label: str
+    input_tokens: int
+    cached_tokens: int
+    output_tokens: int
+    latency: float
+    query_id: int = 0
+
+    @property
+    def cache_hit_rate(self) -> float:
+        return self.cached_tokens / self.input_tokens if self.input_tokens else 0.0
+
+
+class UsageTracker:
+    """Collects per-call usage so prompt-cache hit rates can be inspected.
+
+    Each ``reset`` starts a new query id; records tagged with an earlier id come from
+    calls abandoned by a previous query and are dropped.
+    """
+
+    def __init__(self):
+        self.calls: List[LLMUsage] = []
+        self.query_id = 0
+
+    def record(self, usage: LLMUsage):
+        if usage.query_id == self.query_id:
+            self.calls.append(usage)
+
+    def reset(self):
+        self.query_id += 1
+        self.calls = []
+
+    def summary(self) -> Dict[str, Any]:
+        input_tokens = sum(call.input_tokens for call in self.calls)
+        cached_tokens = sum(call.cached_tokens for call in self.calls)
+        return {
+            "calls": len(self.calls),
+            "input_tokens": input_tokens,
+            "cached_tokens": cached_tokens,
+            "output_tokens": sum(call.output_tokens for call in self.calls),
+            "cache_hit_rate": cached_tokens / input_tokens if input_tokens else 0.0,
+            "latency": sum(call.latency for call in self.calls),
+        }
+
+
+usage_tracker = UsageTracker()
+
+
 def _get_llm() -> ChatOpenAI:
     global _llm
     if _llm is None:
@@ -29,31 +81,74 @@ def _get_llm() -> ChatOpenAI:
     return _llm
 
 
+def _record_usage(label: str, message: Any, latency: float, query_id: int):
+    """Extract token counts (including OpenAI's cached prefix tokens) from a response."""
+    metadata = getattr(message, "usage_metadata", None) or {}
+    details = metadata.get("input_token_details") or {}
+    usage_tracker.record(
+        LLMUsage(
+            label=label,
+            input_tokens=metadata.get("input_tokens", 0),
+            cached_tokens=details.get("cache_read", 0) or 0,
+            output_tokens=metadata.get("output_tokens", 0),
+            latency=latency,
+            query_id=query_id,
+        )
+    )
+
+
 def call_llm(
     prompt: str,
     system_prompt: Optional[str] = None,
     output_schema: Optional[Type[BaseModel]] = None,
     tools: Optional[List[BaseTool]] = None,
+    history: Optional[Sequence[Union[str, BaseMessage]]] = None,
+    label: str = "llm",
 ) -> AIMessage:
+    """Invoke the model with a cache-friendly message layout.
+
+    Messages are ordered from most to least stable: the static system prompt
+    (and any bound tool or output schemas), then the append-only session
+    history, then the per-call prompt. This keeps the prefix identical across
+    consecutive calls so OpenAI's automatic prompt caching can reuse it.
+    """
     final_system_prompt = system_prompt if system_prompt else DEFAULT_SYSTEM_PROMPT
 
-    prompt_template = ChatPromptTemplate.from_messages([
-        ("system", final_system_prompt),
-        ("user", "{prompt}")
-    ])
+    messages: List[BaseMessage] = [SystemMessage(content=final_system_prompt)]
+    messages.extend(
+        entry if isinstance(entry, BaseMessage) else HumanMessage(content=entry) for entry in history or []
+    )
+    messages.append(HumanMessage(content=prompt))
 
     llm = _get_llm()
+    # Let the HTTP request itself give up when the enclosing query deadline does.
+    timeout = request_timeout(default=None)
+    if timeout is not None:
+        llm = llm.model_copy(update={"model_kwargs": {**llm.model_kwargs, "timeout": timeout}})
+    query_id = usage_tracker.query_id
     runnable = llm
     if output_schema:
-        runnable = llm.with_structured_output(output_schema)
+        runnable = llm.with_structured_output(output_schema, include_raw=True)
     elif tools:
         runnable = llm.bind_tools(tools)
 
-    chain = prompt_template | runnable
+    start = time.perf_counter()
     try:
-        return chain.invoke({"prompt": prompt})
+        response = runnable.invoke(messages)
     except Exception as exc:
         message = str(exc)
         if "Incorrect API key" in message or "invalid_api_key" in message or "401" in message:
             raise LLMUnavailableError("OpenAI authentication failed.") from exc
         raise
+    latency = time.perf_counter() - start
+    # A call abandoned by its deadline is discarded, so it must not count toward usage.
+    check_cancelled()
+
+    if output_schema:
+        _record_usage(label, response["raw"], latency, query_id)
+        if response.get("parsing_error"):
+            raise response["parsing_error"]
+        return response["parsed"]
+
+    _record_usage(label, response, latency, query_id)
+    return response
@@ -0,0 +1,228 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from tafin.schemas import Task
+
+####################################
+# Plan cache
+####################################
+# Upper-case words that look like tickers but are not.
+NON_TICKERS = {
+    "A", "I", "AI", "AND", "OR", "THE", "VS", "US", "USA", "USD", "EUR", "GDP", "CPI", "CEO", "CFO",
+    "EPS", "PE", "FCF", "ROE", "ROA", "ROI", "EBIT", "EBITDA", "TTM", "YOY", "QOQ", "YTD", "IPO", "ETF",
+    "SEC", "FY", "Q1", "Q2", "Q3", "Q4", "H1", "H2", "R", "D", "API", "PEG", "EV", "PB", "PS", "CAGR",
+    "BUY", "SELL", "HOLD", "NYSE", "ESG", "IS", "IT", "OF", "TO", "IN", "ON", "AT", "BY", "FOR", "IF",
+    "NO", "ME", "MY", "WE", "DO", "ALL", "TOP", "NEW", "LOW", "HIGH", "RSI", "MACD", "SMA", "EMA", "OHLC",
+    "OHLCV", "JSON", "URL",
+}
+# Single letters are only taken as tickers with a '$' prefix; '/' guards ratios like P/E.
+TICKER_PATTERN = re.compile(r"(?<![\w/$])(\$?)([A-Z]{1,5}(?:\.[A-Z])?)(?![\w/])")
+YEAR_PATTERN = re.compile(r"(?<!\d)((?:19|20)\d{2})(?!\d)")
+PERIOD_PATTERN = re.compile(r"\b(Q[1-4]|annual|annually|quarterly|ttm|trailing twelve months)\b", re.IGNORECASE)
+# Calendar dates, including ones whose year became a placeholder ('{Y0}-10-12').
+DATE_PATTERN = re.compile(r"(?:\d{4}|\{Y\d+\})-\d{1,2}-\d{1,2}|\b\d{1,2}/\d{1,2}/\d{2,4}\b")
+# Bump when the template format or the leak rules change so stale plans are discarded.
+CACHE_VERSION = 2
+# Plans are re-planned after a week so prompt or tool changes eventually reach cached queries.
+PLAN_TTL_SECONDS = 7 * 24 * 3600
+# Words that point back at an earlier turn ("compare that to MSFT", "chart it for 2022").
+REFERRING_WORDS = {
+    "that", "it", "its", "this", "these", "those", "them", "they", "their", "same", "previous", "above",
+    "earlier", "again",
+}
+# Capitalized words a planner uses in task descriptions without naming a company.
+PLAN_WORDS = {
+    "income", "statement", "statements", "balance", "sheet", "sheets", "cash", "flow", "flows", "revenue",
+    "revenues", "net", "gross", "operating", "margin", "margins", "earnings", "free", "profit", "total",
+    "price", "prices", "return", "returns", "equity", "debt", "assets", "liabilities", "ratio", "ratios",
+    "fiscal", "year", "years", "quarter", "quarters", "annual", "quarterly", "daily", "weekly", "monthly",
+    "intraday", "time", "series", "stock", "stocks", "market", "data", "growth", "financial", "financials",
+    "alpha", "vantage", "web", "search", "news", "screener", "moving", "average", "trailing", "twelve", "months",
+}
+
+
+def _extract(query: str) -> Dict[str, List[str]]:
+    """Pull tickers, years and periods out of a query, in order of first appearance."""
+    def unique(values: List[str]) -> List[str]:
+        return list(dict.fromkeys(values))
+
+    tickers = [
+        symbol
+        for dollar, symbol in TICKER_PATTERN.findall(query)
+        if dollar or (len(symbol) > 1 and symbol not in NON_TICKERS)
+    ]
+    return {
+        "T": unique(tickers),
+        "Y": unique(YEAR_PATTERN.findall(query)),
+        "P": unique(PERIOD_PATTERN.findall(query)),
+    }
+
+
+def _value_pattern(value: str, kind: str) -> str:
+    """Regex for one lifted value: years also match inside 'FY2023', periods in any case."""
+    if kind == "Y":
+        return rf"(?<!\d){re.escape(value)}(?!\d)"
+    if kind == "P":
+        return rf"(?i)(?<!\w){re.escape(value)}(?!\w)"
+    return rf"(?<![\w.]){re.escape(value)}(?!\w)"
+
+
+def _substitute(text: str, replacements: List[Tuple[str, str]]) -> str:
+    # Longest values first so 'BRK.B' wins over 'BRK' and 'Q1' never clips 'Q10'.
+    for value, placeholder in sorted(replacements, key=lambda item: -len(item[0])):
+        text = re.sub(_value_pattern(value, placeholder[1]), placeholder, text)
+    return text
+
+
+def _leaks(template: str, query: str, values: Dict[str, List[str]]) -> bool:
+    """Whether a substituted template still carries something specific to ``query``.
+
+    That is any lifted value in another case or spelling ('aapl', 'Aapl's), a ticker,
+    year or date the planner added itself ('... for {T0}, MSFT and GOOGL', '2026-10-12'),
+    or a capitalized word mid-sentence that is neither in the query nor a planning term,
+    which is how a company name ('Apple Inc.') shows up.
+    """
+    for value in values["T"] + values["P"]:
+        if re.search(rf"(?i)(?<![a-z]){re.escape(value)}(?![a-z])", template):
+            return True
+    if any(value in template for value in values["Y"]):
+        return True
+    leftover = _extract(template)
+    if leftover["T"] or leftover["Y"] or DATE_PATTERN.search(template):
+        return True
+    query_words = set(re.findall(r"[a-z]+", query.lower()))
+    for sentence in re.split(r"(?<=[.!?;])\s+|\n+", template):
+        # The first word of a sentence is capitalized anyway ('Fetch', 'Compare').
+        for word in re.findall(r"(?<![\w{])[A-Z][a-z][A-Za-z]*", sentence[1:]):
+            if word.lower() not in query_words and word.lower() not in PLAN_WORDS:
+                return True
+    return False
+
+
+def _placeholders(values: Dict[str, List[str]]) -> List[Tuple[str, str]]:
+    return [(value, f"{{{kind}{index}}}") for kind, items in values.items() for index, value in enumerate(items)]
+
+
+def normalize_query(query: str) -> Tuple[str, Dict[str, List[str]]]:
+    """Return the query's template key and the values that were lifted out of it."""
+    values = _extract(query)
+    text = _substitute(query, _placeholders(values))
+    text = text.replace("$", "")
+    text = re.sub(r"[^\w{}\s]", " ", text.lower())
+    # Placeholders were lower-cased along with everything else; restore them.
+    text = re.sub(r"\{([typ])(\d+)\}", lambda match: f"{{{match.group(1).upper()}{match.group(2)}}}", text)
+    return re.sub(r"\s+", " ", text).strip(), values
+
+
+def depends_on_context(query: str) -> bool:
+    """Whether ``query`` likely needs earlier turns to be understood.
+
+    Queries that name no ticker or refer back to something ("compare that to MSFT")
+    are follow-ups; anything else plans the same with or without a conversation.
+    """
+    if not _extract(query)["T"]:
+        return True
+    return any(word in REFERRING_WORDS for word in re.findall(r"[a-z]+", query.lower()))
+
+
+class PlanCache:
+    """Task-list templates keyed by normalized query shape.
+
+    Tickers, years and periods are replaced with ``{T0}``, ``{Y0}``, ``{P0}`` placeholders
+    so "compare AAPL and MSFT margins" and "compare NVDA and AMD margins" share a plan.
+    Entries are kept in LRU order, bounded by ``max_entries`` and persisted as JSON
+    together with ``CACHE_VERSION``; they expire ``ttl`` seconds after being stored.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 256, ttl: Optional[float] = PLAN_TTL_SECONDS):
+        data_dir = Path(os.getenv("TAFIN_DATA_DIR") or Path.home() / ".tafin")
+        self.path = Path(path) if path else data_dir / "plan_cache.json"
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as handle:
+                data = json.load(handle)
+        except (OSError, ValueError):
+            return
+        # Files from another version (or the unversioned format) are dropped wholesale.
+        if isinstance(data, dict) and data.get("version") == CACHE_VERSION:
+            self._entries = OrderedDict(data.get("entries", {}))
+
+    def _save(self):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".json.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as handle:
+                json.dump({"version": CACHE_VERSION, "entries": self._entries}, handle)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            # The cache is an optimization; an unwritable data dir must not break planning.
+            pass
+
+    def get(self, query: str) -> Optional[List[Task]]:
+        """Instantiate a cached plan for ``query``, or return None on a miss."""
+        key, values = normalize_query(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and time.time() - entry["stored_at"] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        fills = {placeholder: value for value, placeholder in _placeholders(values)}
+        return [
+            Task(
+                id=task["id"],
+                description=re.sub(r"\{[TYP]\d+\}", lambda match: fills.get(match.group(0), match.group(0)), task["description"]),
+                done=False,
+            )
+            for task in entry["tasks"]
+        ]
+
+    def put(self, query: str, tasks: List[Task]):
+        """Store ``tasks`` as a template for the query's shape."""
+        key, values = normalize_query(query)
+        replacements = _placeholders(values)
+        template = [
+            {"id": task.id, "description": _substitute(task.description, replacements)} for task in tasks
+        ]
+        # Only cache plans parameterized by every lifted value and free of query leftovers;
+        # otherwise another query of the same shape would be planned for this one's data.
+        described = "\n".join(task["description"] for task in template)
+        if any(placeholder not in described for _, placeholder in replacements):
+            return
+        if _leaks(described, query, values):
+            return
+        with self._lock:
+            self._entries[key] = {"tasks": template, "stored_at": time.time()}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._save()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,233 @@
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from tafin.utils.deadline import check_cancelled
+
+####################################
+# Local price history store
+####################################
+SERIES_FUNCTIONS = {
+    "TIME_SERIES_INTRADAY",
+    "TIME_SERIES_DAILY",
+    "TIME_SERIES_DAILY_ADJUSTED",
+    "TIME_SERIES_WEEKLY",
+    "TIME_SERIES_MONTHLY",
+}
+
+# How long stored bars are considered fresh before a compact refresh is made.
+REFRESH_SECONDS: Dict[str, int] = {"TIME_SERIES_INTRADAY": 60}
+DEFAULT_REFRESH_SECONDS = 3600
+
+# Alpha Vantage returns this many bars for outputsize=compact.
+COMPACT_BARS = 100
+
+
+def _column_name(raw_key: str) -> str:
+    """Turn an Alpha Vantage field such as '5. adjusted close' into 'adjusted_close'."""
+    return raw_key.split(". ", 1)[-1].strip().replace(" ", "_")
+
+
+def _dtype(columns: List[str]) -> np.dtype:
+    return np.dtype([("ts", "<i8")] + [(column, "<f8") for column in columns])
+
+
+def _to_timestamp(value: str) -> int:
+    return int(np.datetime64(value.replace(" ", "T"), "s").astype("int64"))
+
+
+def _parse_series(payload: Dict[str, Any]) -> Optional[Tuple[str, Dict[str, Any], List[str], np.ndarray]]:
+    """Convert an Alpha Vantage time series payload into a sorted structured array.
+
+    Returns None when the payload holds no series (rate-limit notes, error messages).
+    """
+    series_key = next(
+        (key for key, value in payload.items() if key != "Meta Data" and isinstance(value, dict)),
+        None,
+    )
+    if series_key is None or not payload[series_key]:
+        return None
+    series = payload[series_key]
+    fields = list(next(iter(series.values())).keys())
+    rows = np.empty(len(series), dtype=_dtype([_column_name(field) for field in fields]))
+    for index, (stamp, bar) in enumerate(series.items()):
+        rows[index] = (_to_timestamp(stamp), *(float(bar.get(field, "nan")) for field in fields))
+    rows.sort(order="ts")
+    return series_key, payload.get("Meta Data", {}), fields, rows
+
+
+class PriceStore:
+    """Per-symbol on-disk price history that is downloaded in full once and then appended to.
+
+    Each series is a flat binary file of fixed-width records plus a JSON sidecar describing
+    its columns. Reads go through ``np.memmap`` so history is shared zero-copy across
+    processes; refreshes fetch ``compact`` output and append only the new bars. A single
+    writer per series is assumed.
+    """
+
+    def __init__(self, fetch: Callable[[Dict[str, Any]], Dict[str, Any]], root: Optional[str] = None):
+        self.fetch = fetch
+        self.root = Path(root or os.getenv("TAFIN_DATA_DIR") or Path.home() / ".tafin") / "prices"
+
+    # ---------- public API ----------
+    def query(
+        self,
+        function: str,
+        symbol: str,
+        interval: Optional[str] = None,
+        outputsize: Optional[str] = "compact",
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Serve a time series request from the local store in Alpha Vantage's response shape."""
+        meta, payload = self._sync(function, symbol, interval)
+        if meta is None:
+            # Nothing stored and the API returned no series (e.g. a rate-limit note).
+            return payload or {}
+
+        bars = self.load(function, symbol, interval)
+        if start or end:
+            bars = self._slice(bars, start, end)
+        elif outputsize != "full":
+            bars = bars[-COMPACT_BARS:]
+        return self._to_response(meta, bars)
+
+    def load(self, function: str, symbol: str, interval: Optional[str] = None) -> np.ndarray:
+        """Return the stored bars as a read-only memory map (empty if nothing is stored)."""
+        bin_path, meta_path = self._paths(function, symbol, interval)
+        meta = self._read_meta(meta_path)
+        if meta is None or not bin_path.exists() or bin_path.stat().st_size == 0:
+            return np.empty(0, dtype=_dtype(meta["columns"] if meta else []))
+        return np.memmap(bin_path, dtype=_dtype(meta["columns"]), mode="r")
+
+    # ---------- storage ----------
+    def _paths(self, function: str, symbol: str, interval: Optional[str]) -> Tuple[Path, Path]:
+        name = function.lower() + (f"_{interval}" if interval else "")
+        base = self.root / symbol.upper()
+        return base / f"{name}.bin", base / f"{name}.json"
+
+    @staticmethod
+    def _read_meta(meta_path: Path) -> Optional[Dict[str, Any]]:
+        if not meta_path.exists():
+            return None
+        with open(meta_path, "r", encoding="utf-8") as handle:
+            return json.load(handle)
+
+    @staticmethod
+    def _write_meta(meta_path: Path, meta: Dict[str, Any]):
+        tmp_path = meta_path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump(meta, handle)
+        os.replace(tmp_path, meta_path)
+
+    def _write_full(self, bin_path: Path, meta_path: Path, parsed) -> Dict[str, Any]:
+        series_key, meta_data, fields, rows = parsed
+        # A call abandoned by its query deadline must not race the next query's writes.
+        check_cancelled()
+        bin_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = bin_path.with_suffix(".bin.tmp")
+        rows.tofile(tmp_path)
+        os.replace(tmp_path, bin_path)
+        meta = {
+            "series_key": series_key,
+            "meta_data": meta_data,
+            "fields": fields,
+            "columns": list(rows.dtype.names[1:]),
+            "refreshed_at": time.time(),
+        }
+        self._write_meta(meta_path, meta)
+        return meta
+
+    def _append(self, bin_path: Path, meta: Dict[str, Any], parsed) -> bool:
+        """Append bars newer than the stored history. Returns False if a full reload is needed."""
+        series_key, meta_data, fields, rows = parsed
+        if fields != meta["fields"]:
+            return False
+        existing = np.memmap(bin_path, dtype=rows.dtype, mode="r")
+        count = len(existing)
+        last_ts = int(existing["ts"][-1]) if count else None
+        del existing
+        if last_ts is None or int(rows["ts"][0]) > last_ts:
+            # The compact window does not reach back to our last bar, so there is a gap.
+            return False
+
+        check_cancelled()
+        # The most recent stored bar may have been partial, so rewrite it in place.
+        overlap = rows[rows["ts"] == last_ts]
+        newer = rows[rows["ts"] > last_ts]
+        with open(bin_path, "r+b") as handle:
+            if len(overlap):
+                handle.seek((count - 1) * rows.dtype.itemsize)
+                handle.write(overlap[-1:].tobytes())
+            handle.seek(0, os.SEEK_END)
+            handle.write(newer.tobytes())
+        meta["series_key"] = series_key
+        meta["meta_data"] = meta_data
+        return True
+
+    def _sync(self, function: str, symbol: str, interval: Optional[str]):
+        """Bring the stored series up to date. Returns (meta, raw payload when unusable)."""
+        bin_path, meta_path = self._paths(function, symbol, interval)
+        meta = self._read_meta(meta_path) if bin_path.exists() else None
+        max_age = REFRESH_SECONDS.get(function, DEFAULT_REFRESH_SECONDS)
+        if meta is not None and time.time() - meta["refreshed_at"] < max_age:
+            return meta, None
+
+        params: Dict[str, Any] = {"function": function, "symbol": symbol}
+        if interval:
+            params["interval"] = interval
+
+        if meta is not None:
+            payload = self.fetch({**params, "outputsize": "compact"})
+            parsed = _parse_series(payload)
+            if parsed is None:
+                # Serve the stored history rather than surfacing a transient API error.
+                return meta, payload
+            if self._append(bin_path, meta, parsed):
+                meta["refreshed_at"] = time.time()
+                self._write_meta(meta_path, meta)
+                return meta, None
+
+        payload = self.fetch({**params, "outputsize": "full"})
+        parsed = _parse_series(payload)
+        if parsed is None and meta is None:
+            # Full history can be unavailable (e.g. a premium-only series on a free key);
+            # seed the store with the compact window and extend it on later refreshes.
+            payload = self.fetch({**params, "outputsize": "compact"})
+            parsed = _parse_series(payload)
+        if parsed is None:
+            return meta, payload
+        return self._write_full(bin_path, meta_path, parsed), None
+
+    # ---------- queries ----------
+    @staticmethod
+    def _slice(bars: np.ndarray, start: Optional[str], end: Optional[str]) -> np.ndarray:
+        timestamps = bars["ts"]
+        lo = int(np.searchsorted(timestamps, _to_timestamp(start), side="left")) if start else 0
+        if end:
+            end_ts = _to_timestamp(end)
+            if len(end) == 10:
+                # A bare date includes every bar on that day.
+                end_ts += 86399
+            hi = int(np.searchsorted(timestamps, end_ts, side="right"))
+        else:
+            hi = len(bars)
+        return bars[lo:hi]
+
+    @staticmethod
+    def _to_response(meta: Dict[str, Any], bars: np.ndarray) -> Dict[str, Any]:
+        intraday = "min)" in meta["series_key"]
+        stamps = np.asarray(bars["ts"]).astype("datetime64[s]")
+        labels = np.datetime_as_string(stamps, unit="s" if intraday else "D")
+        series: Dict[str, Dict[str, str]] = {}
+        for index in range(len(bars) - 1, -1, -1):
+            row = bars[index]
+            series[labels[index].replace("T", " ")] = {
+                field: (f"{int(row[column])}" if column == "volume" else f"{row[column]:.4f}")
+                for field, column in zip(meta["fields"], meta["columns"])
+            }
+        return {"Meta Data": meta["meta_data"], meta["series_key"]: series}
@@ -25,6 +25,7 @@ Your current objective is to select the most appropriate tool to make progress o
 Carefully analyze the task description, review the outputs from any previously executed tools, and consider the capabilities of your available tools. 
 Your goal is to choose the single best tool call that will move you closer to completing the task. 
 Think step-by-step to justify your choice of tool and its parameters.
+Outputs from previously executed tools are provided as earlier messages in the conversation; the final message names the current task.
 
 IMPORTANT: If the task cannot be addressed with the available tools (e.g., it's a general knowledge question, math problem, or outside the scope of financial research), 
 do NOT call any tools. Simply return without tool calls. The system will handle providing an appropriate response to the user."""
@@ -35,6 +36,7 @@ Review the task's objective and compare it against the collected results from th
 The task is considered 'done' only if the gathered information is sufficient and directly addresses the task's description. 
 If the results are partial, ambiguous, or erroneous, the task is not done. 
 Your output must be a JSON object with a boolean 'done' field.
+Outputs from previously executed tools are provided as earlier messages in the conversation; the final message names the task to assess.
 
 IMPORTANT: If the task is about answering a query that cannot be addressed with available tools, 
 or if no tool executions were attempted because the query is outside the scope, consider the task 'done' 
@@ -42,7 +44,7 @@ so that the final answer generation can provide an appropriate response to the u
 
 ANSWER_SYSTEM_PROMPT = """You are the answer generation component for TAFIN, a financial research agent. 
 Your critical role is to provide a concise answer to the user's original query. 
-You will receive the original query and all the data gathered from tool executions. 
+You will receive all the data gathered from tool executions as earlier messages, followed by the original query. 
 
 If data was collected, your answer should:
 - Be CONCISE - only include data directly relevant to answering the original query
@@ -0,0 +1,330 @@
+import ast
+import contextvars
+import json
+import operator
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from tafin.utils.deadline import check_cancelled
+
+####################################
+# Stock screener
+####################################
+STATEMENT_ENDPOINTS: Dict[str, str] = {
+    "income_statements": "/financials/income-statements/",
+    "balance_sheets": "/financials/balance-sheets/",
+    "cash_flow_statements": "/financials/cash-flow-statements/",
+}
+
+# Raw fields read from the most recent annual statement of each kind.
+RAW_FIELDS: Dict[str, List[str]] = {
+    "income_statements": ["revenue", "gross_profit", "operating_income", "net_income", "earnings_per_share"],
+    "balance_sheets": ["total_assets", "total_liabilities", "shareholders_equity", "total_debt", "cash_and_equivalents"],
+    "cash_flow_statements": ["free_cash_flow", "net_cash_flow_from_operations", "capital_expenditure"],
+}
+# Fields also read from the prior year so growth rates can be computed.
+GROWTH_FIELDS = ["revenue", "net_income", "earnings_per_share"]
+
+RAW_COLUMNS: List[str] = [field for fields in RAW_FIELDS.values() for field in fields] + [
+    f"{field}_prev" for field in GROWTH_FIELDS
+]
+
+DERIVED_METRICS: Dict[str, Tuple[str, str, str]] = {
+    # name: (numerator, denominator, description)
+    "gross_margin": ("gross_profit", "revenue", "Gross profit / revenue"),
+    "operating_margin": ("operating_income", "revenue", "Operating income / revenue"),
+    "net_margin": ("net_income", "revenue", "Net income / revenue"),
+    "fcf_margin": ("free_cash_flow", "revenue", "Free cash flow / revenue"),
+    "roe": ("net_income", "shareholders_equity", "Net income / shareholders' equity"),
+    "roa": ("net_income", "total_assets", "Net income / total assets"),
+    "debt_to_equity": ("total_debt", "shareholders_equity", "Total debt / shareholders' equity"),
+}
+GROWTH_METRICS: Dict[str, str] = {
+    "revenue_growth": "revenue",
+    "net_income_growth": "net_income",
+    "eps_growth": "earnings_per_share",
+}
+
+METRICS: List[str] = [column for column in RAW_COLUMNS if not column.endswith("_prev")] + list(
+    DERIVED_METRICS
+) + list(GROWTH_METRICS)
+
+DEFAULT_UNIVERSE = [
+    "AAPL", "MSFT", "GOOGL", "AMZN", "NVDA", "META", "TSLA", "BRK.B", "JPM", "V",
+    "UNH", "JNJ", "XOM", "WMT", "PG", "MA", "HD", "CVX", "LLY", "ABBV",
+    "MRK", "PEP", "KO", "AVGO", "COST", "ORCL", "ADBE", "CRM", "NFLX", "AMD",
+]
+
+# Below this many tickers, parsing in-process beats paying for pool start-up.
+PARALLEL_THRESHOLD = 64
+# Statements only change when a company files, so cached ones are refetched daily.
+REFRESH_SECONDS = 24 * 3600
+
+
+def _statement_row(path: str) -> Tuple[float, ...]:
+    """Parse one ticker's cached statements into a row of RAW_COLUMNS (NaN where missing)."""
+    with open(path, "r", encoding="utf-8") as handle:
+        data = json.load(handle)
+    latest: Dict[str, Any] = {}
+    previous: Dict[str, Any] = {}
+    for kind in RAW_FIELDS:
+        statements = sorted(data.get(kind) or [], key=lambda item: item.get("report_period") or "", reverse=True)
+        if statements:
+            latest.update({field: statements[0].get(field) for field in RAW_FIELDS[kind]})
+        if len(statements) > 1:
+            previous.update({field: statements[1].get(field) for field in RAW_FIELDS[kind]})
+
+    def number(value: Any) -> float:
+        return float(value) if isinstance(value, (int, float)) else float("nan")
+
+    row = [number(latest.get(column)) for column in RAW_COLUMNS if not column.endswith("_prev")]
+    row.extend(number(previous.get(field)) for field in GROWTH_FIELDS)
+    return tuple(row)
+
+
+@dataclass
+class ScreenTable:
+    """Column-oriented metrics for a ticker universe; every column aligns with ``tickers``."""
+    tickers: np.ndarray
+    columns: Dict[str, np.ndarray]
+
+    @classmethod
+    def from_rows(cls, tickers: List[str], rows: List[Tuple[float, ...]]) -> "ScreenTable":
+        matrix = np.array(rows, dtype=np.float64).reshape(len(rows), len(RAW_COLUMNS))
+        columns = {name: matrix[:, index] for index, name in enumerate(RAW_COLUMNS)}
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for name, (numerator, denominator, _) in DERIVED_METRICS.items():
+                columns[name] = columns[numerator] / columns[denominator]
+            for name, field in GROWTH_METRICS.items():
+                prior = columns[f"{field}_prev"]
+                columns[name] = (columns[field] - prior) / np.abs(prior)
+        for name, values in columns.items():
+            values[~np.isfinite(values)] = np.nan
+        return cls(tickers=np.array(tickers), columns=columns)
+
+
+class _CriteriaEvaluator:
+    """Evaluate a restricted boolean expression over table columns, element-wise."""
+
+    COMPARE = {
+        ast.Gt: operator.gt, ast.GtE: operator.ge, ast.Lt: operator.lt,
+        ast.LtE: operator.le, ast.Eq: operator.eq, ast.NotEq: operator.ne,
+    }
+    ARITHMETIC = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv}
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        self.columns = columns
+        self.names: List[str] = []
+
+    def evaluate(self, node: ast.AST):
+        if isinstance(node, ast.Expression):
+            return self.evaluate(node.body)
+        if isinstance(node, ast.BoolOp):
+            combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+            return combine.reduce([np.asarray(self.evaluate(value), dtype=bool) for value in node.values])
+        if isinstance(node, ast.UnaryOp):
+            operand = self.evaluate(node.operand)
+            if isinstance(node.op, ast.Not):
+                return ~np.asarray(operand, dtype=bool)
+            if isinstance(node.op, ast.USub):
+                return -operand
+            if isinstance(node.op, ast.UAdd):
+                return operand
+        if isinstance(node, ast.Compare):
+            left = self.evaluate(node.left)
+            result = None
+            for op, comparator in zip(node.ops, node.comparators):
+                if type(op) not in self.COMPARE:
+                    break
+                right = self.evaluate(comparator)
+                step = self.COMPARE[type(op)](left, right)
+                result = step if result is None else np.logical_and(result, step)
+                left = right
+            else:
+                return result
+        if isinstance(node, ast.BinOp) and type(node.op) in self.ARITHMETIC:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                return self.ARITHMETIC[type(node.op)](self.evaluate(node.left), self.evaluate(node.right))
+        if isinstance(node, ast.Name):
+            if node.id not in self.columns or node.id.endswith("_prev"):
+                raise ValueError(f"Unknown metric '{node.id}'. Available metrics: {', '.join(METRICS)}")
+            if node.id not in self.names:
+                self.names.append(node.id)
+            return self.columns[node.id]
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+            return float(node.value)
+        raise ValueError(f"Unsupported expression in criteria: {ast.dump(node)[:60]}")
+
+
+def _normalize_criteria(criteria: str) -> str:
+    """Accept common spellings: AND/OR/NOT, single '=', and percentages such as '15%'."""
+    text = re.sub(r"\b(AND|OR|NOT)\b", lambda match: match.group(1).lower(), criteria)
+    text = re.sub(r"(?<![<>=!])=(?!=)", "==", text)
+    return re.sub(r"(\d+(?:\.\d+)?)\s*%", lambda match: repr(float(match.group(1)) / 100), text)
+
+
+class Screener:
+    """Vectorized screening over locally cached annual statements for a ticker universe.
+
+    Statements are fetched per ticker into ``<data dir>/statements`` (and refreshed in the
+    background once older than ``REFRESH_SECONDS``), then parsed (in a process pool for
+    large universes) into a ``ScreenTable`` kept in memory until the underlying files
+    change, so repeated screens run as pure array operations. A ticker missing any
+    metric named in the criteria never matches, even under ``not``.
+    """
+
+    def __init__(self, fetch: Callable[[str, Dict[str, Any]], Dict[str, Any]], root: Optional[str] = None):
+        self.fetch = fetch
+        self.data_dir = Path(root or os.getenv("TAFIN_DATA_DIR") or Path.home() / ".tafin")
+        self.root = self.data_dir / "statements"
+        self._table: Optional[ScreenTable] = None
+        self._table_key: Optional[Tuple] = None
+        self._refreshing: Set[str] = set()
+        self._refresh_lock = threading.Lock()
+
+    # ---------- universe ----------
+    def universe(self) -> List[str]:
+        """Tickers from TAFIN_SCREENER_UNIVERSE (or <data dir>/universe.txt), else a built-in list."""
+        path = os.getenv("TAFIN_SCREENER_UNIVERSE") or self.data_dir / "universe.txt"
+        if Path(path).exists():
+            with open(path, "r", encoding="utf-8") as handle:
+                tickers = [line.split("#", 1)[0].strip().upper() for line in handle]
+            return [ticker for ticker in tickers if ticker]
+        return list(DEFAULT_UNIVERSE)
+
+    # ---------- data loading ----------
+    def _path(self, ticker: str) -> Path:
+        return self.root / f"{ticker.upper()}.json"
+
+    def _fetch_one(self, ticker: str):
+        params = {"ticker": ticker, "period": "annual", "limit": 2}
+        data = {kind: self.fetch(endpoint, params).get(kind, []) for kind, endpoint in STATEMENT_ENDPOINTS.items()}
+        check_cancelled()
+        path = self._path(ticker)
+        tmp_path = path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump(data, handle)
+        os.replace(tmp_path, path)
+
+    def _fetch_many(self, tickers: List[str]) -> List[str]:
+        """Fetch statements for ``tickers`` concurrently; returns the ones that failed."""
+        failed: List[str] = []
+        if not tickers:
+            return failed
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            # Run each fetch in a copy of this context so it sees the caller's query deadline.
+            futures = [(ticker, pool.submit(contextvars.copy_context().run, self._fetch_one, ticker)) for ticker in tickers]
+            for ticker, future in futures:
+                try:
+                    future.result()
+                except Exception:
+                    failed.append(ticker)
+        return failed
+
+    def refresh_in_background(self, tickers: List[str]) -> Optional[threading.Thread]:
+        """Refetch ``tickers`` on a daemon thread, skipping ones already being refreshed.
+
+        The thread starts with a fresh context, so a refresh outlives the query that
+        triggered it instead of being cancelled with that query's deadline.
+        """
+        with self._refresh_lock:
+            batch = [ticker for ticker in tickers if ticker not in self._refreshing]
+            self._refreshing.update(batch)
+        if not batch:
+            return None
+
+        def run():
+            try:
+                self._fetch_many(batch)
+            finally:
+                with self._refresh_lock:
+                    self._refreshing.difference_update(batch)
+
+        thread = threading.Thread(target=run, name="tafin-screener-refresh", daemon=True)
+        thread.start()
+        return thread
+
+    def sync(self, tickers: List[str], max_age: Optional[float] = None, background: bool = False) -> List[str]:
+        """Download statements for tickers that are missing (or older than max_age seconds).
+
+        With ``background=True`` only tickers without any cached file are fetched before
+        returning; stale ones keep serving their cached statements while they are
+        refreshed on a background thread. Returns the tickers that could not be fetched.
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        now = time.time()
+        missing = [ticker for ticker in tickers if not self._path(ticker).exists()]
+        stale = []
+        if max_age is not None:
+            known = set(tickers) - set(missing)
+            stale = [ticker for ticker in tickers if ticker in known and now - self._path(ticker).stat().st_mtime > max_age]
+        if background:
+            self.refresh_in_background(stale)
+            return self._fetch_many(missing)
+        return self._fetch_many(missing + stale)
+
+    def load_table(self, tickers: List[str]) -> ScreenTable:
+        available = [ticker for ticker in tickers if self._path(ticker).exists()]
+        key = tuple((ticker, self._path(ticker).stat().st_mtime) for ticker in available)
+        if self._table is not None and key == self._table_key:
+            return self._table
+
+        paths = [str(self._path(ticker)) for ticker in available]
+        if len(paths) >= PARALLEL_THRESHOLD:
+            with ProcessPoolExecutor() as pool:
+                rows = list(pool.map(_statement_row, paths, chunksize=max(1, len(paths) // (4 * (os.cpu_count() or 1)))))
+        else:
+            rows = [_statement_row(path) for path in paths]
+        self._table = ScreenTable.from_rows(available, rows)
+        self._table_key = key
+        return self._table
+
+    # ---------- screening ----------
+    def screen(self, criteria: str, tickers: Optional[List[str]] = None, limit: int = 25) -> Dict[str, Any]:
+        """Return tickers whose latest annual metrics satisfy ``criteria``.
+
+        Example criteria: ``revenue_growth > 0.1 and fcf_margin > 15%``.
+        """
+        try:
+            tree = ast.parse(_normalize_criteria(criteria), mode="eval")
+        except SyntaxError as exc:
+            raise ValueError(f"Could not parse criteria '{criteria}': {exc.msg}") from exc
+
+        universe = [ticker.upper() for ticker in (tickers or self.universe())]
+        # Stale statements are refreshed in the background; only tickers never fetched block.
+        missing = self.sync(universe, max_age=REFRESH_SECONDS, background=True)
+        table = self.load_table(universe)
+
+        evaluator = _CriteriaEvaluator(table.columns)
+        mask = np.broadcast_to(np.asarray(evaluator.evaluate(tree), dtype=bool), table.tickers.shape)
+        for name in evaluator.names:
+            mask = mask & ~np.isnan(table.columns[name])
+        indices = np.flatnonzero(mask)
+
+        shown = evaluator.names or ["revenue"]
+        # Rank by the first metric in the criteria, largest first, NaNs last.
+        ranking = table.columns[shown[0]][indices]
+        indices = indices[np.argsort(np.where(np.isnan(ranking), -np.inf, -ranking), kind="stable")]
+
+        matches = []
+        for index in indices[:limit]:
+            row: Dict[str, Any] = {"ticker": str(table.tickers[index])}
+            for name in shown:
+                value = table.columns[name][index]
+                row[name] = None if np.isnan(value) else round(float(value), 4)
+            matches.append(row)
+        return {
+            "criteria": criteria,
+            "universe_size": len(universe),
+            "match_count": int(len(indices)),
+            "matches": matches,
+            "missing": missing,
+        }
@@ -0,0 +1,267 @@
+import json
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from langchain_core.messages import HumanMessage
+
+# Items measured per container when sizing a payload; larger ones are extrapolated.
+SIZE_SAMPLE = 32
+
+
+def _compact(value: Any) -> str:
+    """Serialize structured payloads as compact JSON; anything else via str()."""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+    return str(value)
+
+
+def _sample(items: Iterable, count: int) -> List[Any]:
+    if count <= SIZE_SAMPLE:
+        return list(items)
+    return list(islice(items, 0, None, count // SIZE_SAMPLE))
+
+
+def _json_size(value: Any) -> int:
+    """UTF-8 size of ``value`` as compact JSON, measured by walking it instead of serializing it.
+
+    Containers with more than ``SIZE_SAMPLE`` items are measured from an evenly spaced
+    sample and extrapolated, which is close enough for row-shaped API payloads.
+    """
+    if isinstance(value, str):
+        if value.isascii() and value.isprintable() and '"' not in value and "\\" not in value:
+            return len(value) + 2
+        return len(json.dumps(value, ensure_ascii=False).encode())
+    if isinstance(value, dict):
+        if not value:
+            return 2
+        sample = _sample(value.items(), len(value))
+        measured = sum(_json_size(key if isinstance(key, str) else str(key)) + _json_size(item) for key, item in sample)
+        # Braces, a colon per item and commas between items.
+        return 1 + 2 * len(value) + round(measured * len(value) / len(sample))
+    if isinstance(value, (list, tuple)):
+        if not value:
+            return 2
+        sample = _sample(value, len(value))
+        return 1 + len(value) + round(sum(_json_size(item) for item in sample) * len(value) / len(sample))
+    if value is None or isinstance(value, (bool, int, float)):
+        return len(json.dumps(value))
+    return _json_size(str(value))
+
+
+def _json_pieces(value: Any) -> Iterator[str]:
+    """Yield the compact JSON form of ``value`` piece by piece, so it can be cut short."""
+    if isinstance(value, dict):
+        yield "{"
+        for index, (key, item) in enumerate(value.items()):
+            yield ("," if index else "") + json.dumps(key if isinstance(key, str) else str(key), ensure_ascii=False) + ":"
+            yield from _json_pieces(item)
+        yield "}"
+    elif isinstance(value, (list, tuple)):
+        yield "["
+        for index, item in enumerate(value):
+            if index:
+                yield ","
+            yield from _json_pieces(item)
+        yield "]"
+    else:
+        yield json.dumps(value, ensure_ascii=False, default=str)
+
+
+@dataclass
+class ToolRecord:
+    """A structured tool result whose prompt text is built on demand.
+
+    Only one form is held at a time: the parsed payload until ``text`` is first needed,
+    then just the text, so a stored record never costs both.
+    """
+    tool: str
+    args: Dict[str, Any]
+    result: Any
+    created_at: float = field(default_factory=time.monotonic)
+    _text: Optional[str] = field(default=None, repr=False)
+    _size: Optional[int] = field(default=None, repr=False)
+
+    @property
+    def _prefix(self) -> str:
+        return f"Output of {self.tool} with args {_compact(self.args)}: "
+
+    @property
+    def text(self) -> str:
+        """Prompt form of the result, serialized on first use; the payload is released then."""
+        if self._text is None:
+            self._text = self._prefix + _compact(self.result)
+            self.result = None
+        return self._text
+
+    @property
+    def size(self) -> int:
+        """UTF-8 size of ``text`` in bytes, estimated from the payload without building the text."""
+        if self._size is None:
+            if self._text is not None:
+                self._size = len(self._text.encode())
+            elif isinstance(self.result, (dict, list)):
+                self._size = len(self._prefix.encode()) + _json_size(self.result)
+            else:
+                self._size = len(self._prefix.encode()) + len(str(self.result).encode())
+        return self._size
+
+    def preview(self, limit: int = 100) -> str:
+        """The first ``limit`` characters of the serialized result, rendered only that far."""
+        if self._text is not None:
+            start = len(self._prefix)
+            return self._text[start:start + limit]
+        pieces: List[str] = []
+        length = 0
+        for piece in _json_pieces(self.result) if isinstance(self.result, (dict, list)) else [str(self.result)]:
+            pieces.append(piece)
+            length += len(piece)
+            if length >= limit:
+                break
+        return "".join(pieces)[:limit]
+
+
+@dataclass
+class Turn:
+    query: str
+    answer: str
+    created_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def text(self) -> str:
+        return f"Earlier in this session the user asked: {self.query}\nTAFIN answered: {self.answer}"
+
+    @property
+    def size(self) -> int:
+        return len(self.text.encode())
+
+
+class Session:
+    """State shared across REPL turns: tool results indexed by (tool, args) and past answers.
+
+    Tool results are kept in LRU order and evicted once more than ``max_entries`` are
+    stored or their text exceeds ``max_bytes`` in total (UTF-8). Results older than
+    ``max_age`` seconds are not reused so market data does not go stale.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 200,
+        max_bytes: int = 2_000_000,
+        max_age: Optional[float] = 900.0,
+        max_turns: int = 10,
+        context_bytes: int = 60_000,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.context_bytes = context_bytes
+        self.turns: Deque[Turn] = deque(maxlen=max_turns)
+        self.hits = 0
+        self._records: "OrderedDict[Tuple[str, str], ToolRecord]" = OrderedDict()
+        self._bytes = 0
+
+    @staticmethod
+    def _key(tool: str, args: Dict[str, Any]) -> Tuple[str, str]:
+        return tool, json.dumps(args, sort_keys=True, default=str)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    @property
+    def size(self) -> int:
+        return self._bytes
+
+    # ---------- tool results ----------
+    def get(self, tool: str, args: Dict[str, Any]) -> Optional[ToolRecord]:
+        """Return a fresh stored result for this exact call, if any."""
+        key = self._key(tool, args)
+        record = self._records.get(key)
+        if record is None:
+            return None
+        if self.max_age is not None and time.monotonic() - record.created_at > self.max_age:
+            self._drop(key)
+            return None
+        self._records.move_to_end(key)
+        self.hits += 1
+        return record
+
+    def put(self, tool: str, args: Dict[str, Any], result: Any) -> ToolRecord:
+        key = self._key(tool, args)
+        if key in self._records:
+            self._drop(key)
+        record = ToolRecord(tool=tool, args=args, result=result)
+        self._records[key] = record
+        self._bytes += record.size
+        while self._records and (len(self._records) > self.max_entries or self._bytes > self.max_bytes):
+            self._drop(next(iter(self._records)))
+        return record
+
+    def _drop(self, key: Tuple[str, str]):
+        record = self._records.pop(key)
+        self._bytes -= record.size
+
+    # ---------- conversation ----------
+    def add_turn(self, query: str, answer: Optional[str]):
+        self.turns.append(Turn(query=query, answer=answer or ""))
+
+    def conversation(self) -> str:
+        """Earlier questions and answers, for resolving follow-ups like "compare that to MSFT"."""
+        return "\n\n".join(turn.text for turn in self.turns)
+
+    def context(self) -> List[Union[Turn, ToolRecord]]:
+        """Earlier turns and tool records, oldest first, trimmed to the newest ``context_bytes``.
+
+        Entries are interleaved in the order they happened, so each new turn only appends
+        to the previous turn's context and the prompt prefix stays cacheable. An entry too
+        large for the remaining budget is skipped so older, smaller ones still fit.
+        """
+        items: List[Union[Turn, ToolRecord]] = sorted(
+            [*self.turns, *self._records.values()], key=lambda item: item.created_at
+        )
+        selected: List[Union[Turn, ToolRecord]] = []
+        budget = self.context_bytes
+        for item in reversed(items):
+            if item.size > budget:
+                continue
+            selected.append(item)
+            budget -= item.size
+        return selected[::-1]
+
+    def clear(self):
+        self.turns.clear()
+        self._records.clear()
+        self._bytes = 0
+
+
+class RunHistory:
+    """Prompt history for one query, holding turns, tool records and error notes.
+
+    Each entry becomes a message once, the first time the history is sent to the model;
+    later steps reuse the memoized message list and only convert entries added since.
+    """
+
+    def __init__(self, context: Optional[List[Union[Turn, ToolRecord]]] = None):
+        self._entries: List[Union[str, Turn, ToolRecord]] = []
+        self._messages: List[HumanMessage] = []
+        self._record_ids = set()
+        for entry in context or []:
+            self.add(entry)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, entry: Union[str, Turn, ToolRecord]):
+        """Append an entry; a record reused from the session is only added once."""
+        if isinstance(entry, ToolRecord):
+            if id(entry) in self._record_ids:
+                return
+            self._record_ids.add(id(entry))
+        self._entries.append(entry)
+
+    def messages(self) -> List[HumanMessage]:
+        for entry in self._entries[len(self._messages):]:
+            self._messages.append(HumanMessage(content=entry if isinstance(entry, str) else entry.text))
+        return self._messages
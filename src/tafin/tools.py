@@ -1,9 +1,17 @@
 from langchain.tools import tool
-from typing import Any, Callable, Dict, List, Literal, Optional
+from typing import Any, Callable, Dict, List, Literal, Optional, Tuple
 import requests
 import os
+import re
+import threading
+import time
+from collections import OrderedDict
 from pydantic import BaseModel, Field
 
+from tafin.price_store import SERIES_FUNCTIONS, PriceStore
+from tafin.screener import METRICS, Screener
+from tafin.utils.deadline import request_timeout
+
 ####################################
 # Tools
 ####################################
@@ -27,6 +35,22 @@ class SearchInput(BaseModel):
     num_results: int = Field(default=5, ge=1, le=10, description="Number of organic results to return.")
 
 
+class BatchSearchInput(BaseModel):
+    queries: List[str] = Field(description="Several related search queries to submit to Serper (Google Search) in one batch.")
+    num_results: int = Field(default=5, ge=1, le=10, description="Number of organic results to return per query.")
+
+
+class ScreenerInput(BaseModel):
+    criteria: str = Field(
+        description=(
+            "Boolean expression over latest annual metrics, e.g. 'revenue_growth > 0.1 and fcf_margin > 0.15'. "
+            f"Ratios are fractions. Available metrics: {', '.join(METRICS)}."
+        )
+    )
+    tickers: Optional[List[str]] = Field(default=None, description="Optional tickers to screen instead of the coverage universe.")
+    limit: int = Field(default=25, ge=1, le=200, description="Maximum number of matching tickers to return.")
+
+
 class AlphaVantageInput(BaseModel):
     function: Literal[
         "TIME_SERIES_INTRADAY",
@@ -45,6 +69,14 @@ class AlphaVantageInput(BaseModel):
         default="compact",
         description="Amount of data to retrieve where supported."
     )
+    start_date: Optional[str] = Field(
+        default=None,
+        description="Optional start of the date range (YYYY-MM-DD) for time series requests."
+    )
+    end_date: Optional[str] = Field(
+        default=None,
+        description="Optional end of the date range (YYYY-MM-DD, inclusive) for time series requests."
+    )
 
 
 def _require_key(name: str, value: Optional[str]) -> str:
@@ -81,7 +113,7 @@ def call_financialdatasets_api(endpoint: str, params: Dict[str, Any]) -> Dict[st
     base_url = "https://api.financialdatasets.ai"
     url = f"{base_url}{endpoint}"
     headers = {"x-api-key": api_key}
-    response = requests.get(url, params=params, headers=headers, timeout=30)
+    response = requests.get(url, params=params, headers=headers, timeout=request_timeout())
     response.raise_for_status()
     return response.json()
 
@@ -139,55 +171,202 @@ def _serper_request(query: str, num_results: int) -> Dict[str, Any]:
     url = "https://google.serper.dev/search"
     headers = {"X-API-KEY": api_key, "Content-Type": "application/json"}
     payload = {"q": query, "num": num_results}
-    response = requests.post(url, json=payload, headers=headers, timeout=30)
+    response = requests.post(url, json=payload, headers=headers, timeout=request_timeout())
     response.raise_for_status()
     return response.json()
 
 
-@tool(args_schema=SearchInput)
-def web_search(query: str, num_results: int = 5) -> Dict[str, Any]:
-    """Perform a Serper (Google) search and return the top organic results."""
-    data = _serper_request(query, num_results)
+def _serper_batch_request(queries: List[str], num_results: int) -> List[Dict[str, Any]]:
+    """Submit several queries in a single request using Serper's batch form (a JSON array)."""
+    api_key = _require_key("SERPER_API_KEY", serper_api_key)
+    url = "https://google.serper.dev/search"
+    headers = {"X-API-KEY": api_key, "Content-Type": "application/json"}
+    payload = [{"q": query, "num": num_results} for query in queries]
+    response = requests.post(url, json=payload, headers=headers, timeout=request_timeout())
+    response.raise_for_status()
+    data = response.json()
+    data = data if isinstance(data, list) else [data]
+    if len(data) != len(queries):
+        # Results are matched to queries by position, so a short response cannot be trusted.
+        raise ValueError(f"Serper returned {len(data)} results for a batch of {len(queries)} queries.")
+    return data
+
+
+def _normalize_query(query: str) -> str:
+    return re.sub(r"\s+", " ", query).strip().strip("?!.").lower()
+
+
+def _normalize_url(url: str) -> str:
+    return url.split("#", 1)[0].rstrip("/").lower()
+
+
+class SearchCache:
+    """Short-lived cache of trimmed search results keyed by normalized query.
+
+    Holds at most ``max_entries`` results in LRU order; expired ones are swept on every put.
+    Results are copied in and out, so callers may modify what they receive.
+    """
+
+    def __init__(self, ttl: float = 300.0, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, int], Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, query: str, num_results: int) -> Optional[List[Dict[str, Any]]]:
+        key = (_normalize_query(query), num_results)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            # Callers (and the session) keep what they get, so never hand out the cached objects.
+            return [dict(item) for item in entry[1]]
+
+    def put(self, query: str, num_results: int, results: List[Dict[str, Any]]):
+        now = time.monotonic()
+        key = (_normalize_query(query), num_results)
+        with self._lock:
+            for expired in [k for k, (stored_at, _) in self._entries.items() if now - stored_at > self.ttl]:
+                del self._entries[expired]
+            self._entries[key] = (now, [dict(item) for item in results])
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+search_cache = SearchCache()
+
+
+def _trim_results(data: Dict[str, Any], num_results: int) -> List[Dict[str, Any]]:
     organic = data.get("organic", [])
-    trimmed = [
+    return [
         {"title": item.get("title"), "link": item.get("link"), "snippet": item.get("snippet")}
         for item in organic[:num_results]
     ]
+
+
+def _cached_search(queries: List[str], num_results: int) -> Dict[str, List[Dict[str, Any]]]:
+    """Resolve each query from the cache, sending all misses to Serper in one batch."""
+    results: Dict[str, List[Dict[str, Any]]] = {}
+    misses: List[str] = []
+    for query in queries:
+        cached = search_cache.get(query, num_results)
+        if cached is not None:
+            results[query] = cached
+        elif _normalize_query(query) not in {_normalize_query(miss) for miss in misses}:
+            misses.append(query)
+
+    if len(misses) == 1:
+        responses = [_serper_request(misses[0], num_results)]
+    elif misses:
+        responses = _serper_batch_request(misses, num_results)
+    else:
+        responses = []
+    for query, data in zip(misses, responses):
+        trimmed = _trim_results(data, num_results)
+        search_cache.put(query, num_results, trimmed)
+        results[query] = trimmed
+
+    # Near-duplicate queries in the same batch share the result of the first one sent.
+    for query in queries:
+        if query not in results:
+            results[query] = search_cache.get(query, num_results) or []
+    return results
+
+
+@tool(args_schema=SearchInput)
+def web_search(query: str, num_results: int = 5) -> Dict[str, Any]:
+    """Perform a Serper (Google) search and return the top organic results."""
+    trimmed = _cached_search([query], num_results)[query]
     return {"query": query, "results": trimmed}
 
 
+@tool(args_schema=BatchSearchInput)
+def web_search_batch(queries: List[str], num_results: int = 5) -> Dict[str, Any]:
+    """Run several related Serper (Google) searches at once and return the combined results, deduplicated by URL.
+    Prefer this over repeated web_search calls when exploring one topic from several angles."""
+    per_query = _cached_search(queries, num_results)
+    merged: Dict[str, Dict[str, Any]] = {}
+    for query in queries:
+        for item in per_query[query]:
+            key = _normalize_url(item.get("link") or "") or (item.get("title") or "")
+            if key in merged:
+                if query not in merged[key]["queries"]:
+                    merged[key]["queries"].append(query)
+                continue
+            merged[key] = {**item, "queries": [query]}
+    return {"queries": queries, "results": list(merged.values())}
+
+
 def _alpha_vantage_request(params: Dict[str, Any]) -> Dict[str, Any]:
     api_key = _require_key("ALPHA_VANTAGE_API_KEY", alpha_vantage_api_key)
     url = "https://www.alphavantage.co/query"
     params_with_key = {**params, "apikey": api_key}
-    response = requests.get(url, params=params_with_key, timeout=30)
+    response = requests.get(url, params=params_with_key, timeout=request_timeout())
     response.raise_for_status()
     return response.json()
 
 
+# Time series are served from a local store that only downloads new bars after the first fetch.
+price_store = PriceStore(_alpha_vantage_request)
+
+
 @tool(args_schema=AlphaVantageInput)
 def alpha_vantage_query(
     function: str,
     symbol: str,
     interval: Optional[str] = None,
-    outputsize: Optional[str] = "compact"
+    outputsize: Optional[str] = "compact",
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None
 ) -> Dict[str, Any]:
     """Call the Alpha Vantage API for market data or company overview."""
+    if function == "TIME_SERIES_INTRADAY" and not interval:
+        raise ValueError("Interval is required when function is TIME_SERIES_INTRADAY.")
+    if function in SERIES_FUNCTIONS:
+        return price_store.query(
+            function,
+            symbol,
+            interval=interval if function == "TIME_SERIES_INTRADAY" else None,
+            outputsize=outputsize,
+            start=start_date,
+            end=end_date,
+        )
     params: Dict[str, Any] = {"function": function, "symbol": symbol, "outputsize": outputsize}
-    if function == "TIME_SERIES_INTRADAY":
-        if not interval:
-            raise ValueError("Interval is required when function is TIME_SERIES_INTRADAY.")
-        params["interval"] = interval
     data = _alpha_vantage_request(params)
     return data
 
 
+# Screens run over statements cached locally for the whole coverage universe.
+screener = Screener(call_financialdatasets_api)
+
+
+@tool(args_schema=ScreenerInput)
+def screen_stocks(criteria: str, tickers: Optional[List[str]] = None, limit: int = 25) -> Dict[str, Any]:
+    """Screen the coverage universe (or given tickers) on financial metrics in one call.
+    Use this instead of fetching statements ticker by ticker when filtering many companies."""
+    return screener.screen(criteria, tickers=tickers, limit=limit)
+
+
 TOOLS: List[Callable[..., Any]] = [
     get_income_statements,
     get_balance_sheets,
     get_cash_flow_statements,
     web_search,
+    web_search_batch,
     alpha_vantage_query,
+    screen_stocks,
 ]
 
 RISKY_TOOLS: Dict[str, Callable[..., Any]] = {}  # guardrail: require confirmation
@@ -198,6 +377,30 @@ def run_web_search(query: str, num_results: int = 5) -> Dict[str, Any]:
     return web_search.func(query=query, num_results=num_results)
 
 
-def run_alpha_vantage(function: str, symbol: str, interval: Optional[str] = None, outputsize: Optional[str] = "compact") -> Dict[str, Any]:
+def run_web_search_batch(queries: List[str], num_results: int = 5) -> Dict[str, Any]:
+    """Convenience helper for CLI fallback mode to run several searches through the shared cache."""
+    return web_search_batch.func(queries=queries, num_results=num_results)
+
+
+def run_screener(criteria: str, tickers: Optional[List[str]] = None, limit: int = 25) -> Dict[str, Any]:
+    """Convenience helper for the /screener CLI command."""
+    return screen_stocks.func(criteria=criteria, tickers=tickers, limit=limit)
+
+
+def run_alpha_vantage(
+    function: str,
+    symbol: str,
+    interval: Optional[str] = None,
+    outputsize: Optional[str] = "compact",
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None
+) -> Dict[str, Any]:
     """Convenience helper for CLI fallback mode to call Alpha Vantage directly."""
-    return alpha_vantage_query.func(function=function, symbol=symbol, interval=interval, outputsize=outputsize)
+    return alpha_vantage_query.func(
+        function=function,
+        symbol=symbol,
+        interval=interval,
+        outputsize=outputsize,
+        start_date=start_date,
+        end_date=end_date,
+    )
@@ -0,0 +1,95 @@
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Optional
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a query runs past its wall-clock budget or is cancelled."""
+
+
+class Deadline:
+    """Wall-clock budget for a single query with cooperative cancellation.
+
+    Blocking calls are run on a daemon worker thread so the caller can stop waiting
+    as soon as the budget is spent (or Ctrl-C is pressed). Threads cannot be killed,
+    so the worker sees the deadline through ``current_deadline()``: network calls size
+    their timeouts with ``request_timeout()`` and writes are guarded by ``check_cancelled()``,
+    so an abandoned call stops at its next request or write instead of running on.
+    """
+
+    def __init__(self, seconds: Optional[float] = None):
+        self.expires_at = time.monotonic() + seconds if seconds else None
+        self._cancelled = threading.Event()
+
+    def remaining(self) -> Optional[float]:
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return self._cancelled.is_set() or (remaining is not None and remaining <= 0)
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def check(self):
+        """Raise DeadlineExceeded if the budget is spent; call between steps."""
+        if self.expired():
+            raise DeadlineExceeded("Query time limit reached.")
+
+    def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run ``func`` but give up waiting once the deadline passes."""
+        self.check()
+        outcome: dict = {}
+        done = threading.Event()
+
+        def target():
+            _current.set(self)
+            try:
+                outcome["result"] = func(*args, **kwargs)
+            except BaseException as exc:
+                outcome["error"] = exc
+            finally:
+                done.set()
+
+        threading.Thread(target=target, daemon=True).start()
+        try:
+            finished = done.wait(self.remaining())
+        except KeyboardInterrupt:
+            self.cancel()
+            raise
+        if not finished:
+            self.cancel()
+            raise DeadlineExceeded("Query time limit reached.")
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome["result"]
+
+
+_current: ContextVar[Optional[Deadline]] = ContextVar("tafin_deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """The deadline of the ``Deadline.run`` call this code is executing under, if any."""
+    return _current.get()
+
+
+def check_cancelled():
+    """Raise DeadlineExceeded if the enclosing deadline has passed or been cancelled."""
+    deadline = _current.get()
+    if deadline is not None:
+        deadline.check()
+
+
+def request_timeout(default: Optional[float] = 30.0) -> Optional[float]:
+    """Timeout for one network request: ``default``, capped by the enclosing deadline."""
+    deadline = _current.get()
+    if deadline is None:
+        return default
+    deadline.check()
+    remaining = deadline.remaining()
+    if remaining is None or default is None:
+        return remaining if remaining is not None else default
+    return min(default, remaining)
@@ -1,38 +1,181 @@
-from tafin.utils.ui import UI
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import asdict
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from tafin.utils.ui import UI, progress_renderer
+
+Event = Dict[str, Any]
+
+
+class ConsoleSubscriber:
+    """Renders log events on the terminal through the UI helpers."""
+
+    def __init__(self, ui: UI):
+        self.ui = ui
+
+    def __call__(self, event: Event):
+        # Print above the live progress block so in-flight operations stay intact.
+        progress_renderer.write_above(lambda: self._render(event))
+
+    def _render(self, event: Event):
+        kind = event["event"]
+        if kind == "message":
+            print(event["message"], flush=True)
+        elif kind == "header":
+            self.ui.print_header(event["message"])
+        elif kind == "task_list":
+            self.ui.print_task_list(event["tasks"])
+        elif kind == "task_start":
+            self.ui.print_task_start(event["task"])
+        elif kind == "task_done":
+            self.ui.print_task_done(event["task"])
+        elif kind == "tool_run":
+            self.ui.print_tool_run(event["tool"], event["preview"])
+        elif kind == "risky":
+            self.ui.print_warning(f"Risky action {event['tool']}({event['input']}) auto-confirmed")
+        elif kind == "summary":
+            self.ui.print_answer(event["answer"])
+        elif kind == "info":
+            self.ui.print_info(event["message"])
+        elif kind == "error":
+            where = f"{event['tool']}({event['args']}): " if event.get("tool") else ""
+            self.ui.print_error(f"{where}{event['message']}")
+        elif kind == "usage":
+            self.ui.print_usage(event["calls"], event["summary"])
+
+
+class JSONLSubscriber:
+    """Appends every event as one JSON object per line."""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._handle = open(path, "a", encoding="utf-8")
+
+    def __call__(self, event: Event):
+        self._handle.write(json.dumps(event, default=str) + "\n")
+        self._handle.flush()
+
+
+class LogSink:
+    """Queue-backed event sink drained by a background thread.
+
+    ``emit`` never blocks: events are queued and handed to each subscriber off the
+    caller's thread. The most recent ``history_size`` events are kept in a ring buffer.
+    """
+
+    def __init__(self, history_size: int = 1000, max_pending: int = 10000):
+        self.history: Deque[Event] = deque(maxlen=history_size)
+        self.subscribers: List[Callable[[Event], None]] = []
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[Event]]" = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._drain, name="tafin-log-sink", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+        # Spinner final lines are printed by the calling thread; drain queued events first
+        # so the console stays in the order things happened.
+        progress_renderer.before_output(self.flush)
+
+    def subscribe(self, subscriber: Callable[[Event], None]):
+        self.subscribers.append(subscriber)
+
+    def emit(self, event: Event):
+        self.history.append(event)
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        """Block until every queued event has been handed to the subscribers."""
+        if self._thread.is_alive() and threading.current_thread() is not self._thread:
+            self._queue.join()
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def _drain(self):
+        while True:
+            event = self._queue.get()
+            try:
+                if event is None:
+                    return
+                for subscriber in self.subscribers:
+                    try:
+                        subscriber(event)
+                    except Exception:
+                        # A failing subscriber must not take logging down with it.
+                        pass
+            finally:
+                self._queue.task_done()
 
 
 class Logger:
-    """Logging facade that delegates to the interactive UI."""
+    """Logging facade that emits structured events; console output is one subscriber."""
 
-    def __init__(self):
+    def __init__(self, history_size: int = 1000, log_file: Optional[str] = None):
         self.ui = UI()
-        self.log = []
+        self.sink = LogSink(history_size=history_size)
+        self.sink.subscribe(ConsoleSubscriber(self.ui))
+        log_file = log_file or os.getenv("TAFIN_LOG_FILE")
+        if log_file:
+            self.sink.subscribe(JSONLSubscriber(log_file))
+
+    @property
+    def log(self) -> Deque[Event]:
+        """Most recent events, bounded by ``history_size``."""
+        return self.sink.history
+
+    def _emit(self, event: str, **fields: Any):
+        self.sink.emit({"ts": time.time(), "event": event, **fields})
 
     def _log(self, msg: str):
-        """Print immediately and keep in log history."""
-        print(msg, flush=True)
-        self.log.append(msg)
+        """Queue a plain message for output and keep it in log history."""
+        self._emit("message", message=msg)
 
     def log_header(self, msg: str):
-        self.ui.print_header(msg)
+        self._emit("header", message=msg)
 
     def log_task_list(self, tasks):
-        self.ui.print_task_list(tasks)
+        self._emit("task_list", tasks=list(tasks))
 
     def log_task_start(self, task_desc: str):
-        self.ui.print_task_start(task_desc)
+        self._emit("task_start", task=task_desc)
 
     def log_task_done(self, task_desc: str):
-        self.ui.print_task_done(task_desc)
+        self._emit("task_done", task=task_desc)
+
+    def log_tool_run(self, tool: str, preview: str = "", size: Optional[int] = None, args: Optional[Dict[str, Any]] = None):
+        preview = str(preview)
+        self._emit("tool_run", tool=tool, args=args, preview=preview[:100], size=len(preview) if size is None else size)
 
-    def log_tool_run(self, tool: str, result: str = ""):
-        self.ui.print_tool_run(tool, str(result)[:100])
+    def log_error(self, message: str, tool: Optional[str] = None, args: Optional[Dict[str, Any]] = None):
+        """Record a failure; ``tool`` and ``args`` identify the call when a tool was involved."""
+        self._emit("error", message=message, tool=tool, args=args)
 
     def log_risky(self, tool: str, input_str: str):
-        self.ui.print_warning(f"Risky action {tool}({input_str}) auto-confirmed")
+        self._emit("risky", tool=tool, input=input_str)
 
     def log_summary(self, summary: str):
-        self.ui.print_answer(summary)
+        self._emit("summary", answer=summary)
+
+    def log_info(self, msg: str):
+        self._emit("info", message=msg)
+
+    def log_usage(self, calls, summary):
+        self._emit("usage", calls=[{**asdict(call), "cache_hit_rate": call.cache_hit_rate} for call in calls], summary=summary)
+
+    def flush(self):
+        """Wait until queued events have been rendered (e.g. before prompting for input)."""
+        self.sink.flush()
 
     def progress(self, message: str, success_message: str = ""):
         """Return a progress context manager for showing loading states."""
@@ -1,3 +1,5 @@
+import os
+import shutil
 import sys
 import threading
 import time
@@ -18,43 +20,129 @@ class Colors:
     DIM = "\033[2m"
 
 
-class Spinner:
-    """Simple terminal spinner running in a background thread."""
+class ProgressRenderer:
+    """One background thread that draws every in-flight operation as a live block of lines.
+
+    On a TTY the block is redrawn in place every ``interval`` seconds; otherwise nothing is
+    animated and only each operation's final line is printed. Set ``TAFIN_PROGRESS=off``
+    (or call ``configure_progress(False)``) to silence progress output entirely.
+    """
 
     FRAMES = ["|", "/", "-", "\\"]
 
+    def __init__(self, interval: float = 0.08):
+        self.interval = interval
+        self.enabled = os.getenv("TAFIN_PROGRESS", "on").lower() not in {"off", "0", "false"}
+        self.lock = threading.RLock()
+        self._changed = threading.Condition(self.lock)
+        self._active: List["Spinner"] = []
+        self._drawn = 0
+        self._frame = 0
+        self._thread: Optional[threading.Thread] = None
+        self._before_output: List[Callable[[], None]] = []
+
+    def before_output(self, hook: Callable[[], None]):
+        """Run ``hook`` before each final line is printed, e.g. to drain queued log events
+        so the line lands after everything logged while the operation ran."""
+        self._before_output.append(hook)
+
+    @property
+    def interactive(self) -> bool:
+        return sys.stdout.isatty()
+
+    def add(self, spinner: "Spinner"):
+        if not self.enabled:
+            return
+        with self.lock:
+            self._active.append(spinner)
+            if self.interactive:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._loop, name="tafin-progress", daemon=True)
+                    self._thread.start()
+                self._redraw()
+                self._changed.notify()
+
+    def remove(self, spinner: "Spinner", final_line: str = ""):
+        # Always forget the spinner, even if progress was turned off after it started.
+        with self.lock:
+            if spinner in self._active:
+                self._active.remove(spinner)
+            if not self.enabled:
+                self._clear()
+                sys.stdout.flush()
+                return
+        # Outside the lock: hooks may wait on threads that draw through write_above.
+        for hook in self._before_output:
+            hook()
+        self.write_above(lambda: print(final_line) if final_line else None)
+
+    def write_above(self, render: Callable[[], None]):
+        """Run ``render`` (which prints) above the live block, then redraw the block."""
+        with self.lock:
+            self._clear()
+            render()
+            self._redraw()
+            sys.stdout.flush()
+
+    def _clear(self):
+        if self._drawn:
+            # Move to the first line of the live block and erase everything below it.
+            sys.stdout.write(f"\033[{self._drawn}F\033[J")
+            self._drawn = 0
+
+    def _redraw(self):
+        if not self.enabled or not self.interactive or not self._active:
+            return
+        self._clear()
+        width = shutil.get_terminal_size().columns - 1
+        frame = self.FRAMES[self._frame % len(self.FRAMES)]
+        now = time.monotonic()
+        for spinner in self._active:
+            text = f"{frame} {spinner.message} ({now - spinner.started_at:.1f}s)"[:width]
+            sys.stdout.write(f"{spinner.color}{text}{Colors.ENDC}\n")
+        self._drawn = len(self._active)
+        sys.stdout.flush()
+
+    def _loop(self):
+        while True:
+            with self._changed:
+                while not self._active:
+                    self._changed.wait()
+                self._frame += 1
+                self._redraw()
+            time.sleep(self.interval)
+
+
+progress_renderer = ProgressRenderer()
+
+
+def configure_progress(enabled: bool):
+    """Turn live progress output on or off (e.g. for batch or service use)."""
+    progress_renderer.enabled = enabled
+
+
+class Spinner:
+    """Handle for one in-flight operation drawn by the shared progress renderer."""
+
     def __init__(self, message: str = "", color: str = Colors.CYAN):
         self.message = message
         self.color = color
+        self.started_at = time.monotonic()
         self._running = False
-        self._thread: Optional[threading.Thread] = None
-
-    def _animate(self):
-        index = 0
-        while self._running:
-            frame = self.FRAMES[index % len(self.FRAMES)]
-            sys.stdout.write(f"\r{self.color}{frame} {self.message}{Colors.ENDC}")
-            sys.stdout.flush()
-            time.sleep(0.08)
-            index += 1
 
     def start(self):
         if self._running:
             return
         self._running = True
-        self._thread = threading.Thread(target=self._animate, daemon=True)
-        self._thread.start()
+        self.started_at = time.monotonic()
+        progress_renderer.add(self)
 
     def stop(self, final_message: str = "", symbol: str = "[OK]", symbol_color: str = Colors.GREEN):
         if not self._running:
             return
         self._running = False
-        if self._thread:
-            self._thread.join()
-        sys.stdout.write("\r" + " " * (len(self.message) + 4) + "\r")
-        if final_message:
-            print(f"{symbol_color}{symbol}{Colors.ENDC} {final_message}")
-        sys.stdout.flush()
+        final_line = f"{symbol_color}{symbol}{Colors.ENDC} {final_message}" if final_message else ""
+        progress_renderer.remove(self, final_line)
 
     def update_message(self, message: str):
         self.message = message
@@ -75,6 +163,9 @@ def show_progress(message: str, success_message: str = ""):
             except Exception as exc:
                 spinner.stop(f"Failed: {exc}", symbol="[!!]", symbol_color=Colors.RED)
                 raise
+            except KeyboardInterrupt:
+                spinner.stop("Cancelled", symbol="[--]", symbol_color=Colors.YELLOW)
+                raise
 
         return wrapper
 
@@ -98,6 +189,9 @@ class UI:
         except Exception as exc:
             spinner.stop(f"Failed: {exc}", symbol="[!!]", symbol_color=Colors.RED)
             raise
+        except KeyboardInterrupt:
+            spinner.stop("Cancelled", symbol="[--]", symbol_color=Colors.YELLOW)
+            raise
         finally:
             self.current_spinner = None
 
@@ -140,6 +234,19 @@ class UI:
 
         print(f"{Colors.BLUE}{border}{Colors.ENDC}\n")
 
+    def print_usage(self, calls: Iterable, summary: dict):
+        self.print_header("LLM Usage")
+        for call in calls:
+            print(
+                f"{Colors.DIM}{call['label']:<9} input={call['input_tokens']:<6} cached={call['cached_tokens']:<6} "
+                f"({call['cache_hit_rate']:.0%}) output={call['output_tokens']:<5} {call['latency']:.2f}s{Colors.ENDC}"
+            )
+        print(
+            f"{Colors.BOLD}total{Colors.ENDC}     calls={summary['calls']} input={summary['input_tokens']} "
+            f"cached={summary['cached_tokens']} ({summary['cache_hit_rate']:.0%}) "
+            f"output={summary['output_tokens']} {summary['latency']:.2f}s"
+        )
+
     def print_info(self, message: str):
         print(f"{Colors.DIM}{message}{Colors.ENDC}")
 
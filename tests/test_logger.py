@@ -0,0 +1,32 @@
+from tafin.utils.logger import Logger
+from tafin.utils.ui import Spinner, configure_progress, progress_renderer
+
+
+def test_spinner_final_line_follows_events_logged_before_it(capsys):
+    enabled = progress_renderer.enabled
+    configure_progress(True)
+    try:
+        logger = Logger()
+        spinner = Spinner("Planning tasks...")
+        spinner.start()
+        for index in range(50):
+            logger.log_info(f"event {index}")
+        spinner.stop("Tasks planned")
+        logger.flush()
+    finally:
+        configure_progress(enabled)
+
+    lines = [line for line in capsys.readouterr().out.splitlines() if line]
+    assert "Tasks planned" in lines[-1]
+    assert "event 49" in lines[-2]
+
+
+def test_error_events_carry_tool_and_args():
+    logger = Logger()
+
+    logger.log_error("boom", tool="web_search", args={"query": "aapl"})
+    logger.log_tool_run("web_search", '{"results":[]}', 14, args={"query": "aapl"})
+
+    error, tool_run = list(logger.log)[-2:]
+    assert (error["event"], error["tool"], error["args"]) == ("error", "web_search", {"query": "aapl"})
+    assert (tool_run["event"], tool_run["args"], tool_run["size"]) == ("tool_run", {"query": "aapl"}, 14)
@@ -0,0 +1,111 @@
+import json
+
+from tafin.plan_cache import PlanCache, depends_on_context, normalize_query
+from tafin.schemas import Task
+
+
+def make_cache(tmp_path) -> PlanCache:
+    return PlanCache(path=str(tmp_path / "plan_cache.json"))
+
+
+def tasks(*descriptions: str):
+    return [Task(id=index, description=description, done=False) for index, description in enumerate(descriptions, 1)]
+
+
+def descriptions(plan):
+    return [task.description for task in plan]
+
+
+def test_reuses_parameterized_plan_for_same_shape(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put("Compare AAPL and MSFT margins in 2023", tasks("Fetch AAPL income statements for 2023", "Fetch MSFT income statements for 2023"))
+
+    plan = cache.get("Compare NVDA and AMD margins in 2021")
+
+    assert descriptions(plan) == ["Fetch NVDA income statements for 2021", "Fetch AMD income statements for 2021"]
+
+
+def test_fiscal_year_prefix_is_parameterized(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put("Summarize AAPL cash flow for 2023", tasks("Fetch AAPL cash flow statements for FY2023"))
+
+    assert descriptions(cache.get("Summarize MSFT cash flow for 2021")) == ["Fetch MSFT cash flow statements for FY2021"]
+
+
+def test_refuses_template_naming_the_company(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put("Summarize AAPL cash flow for 2023", tasks("Fetch Apple Inc. (AAPL) cash flow statements for FY2023"))
+
+    assert cache.get("Summarize MSFT cash flow for 2021") is None
+
+
+def test_refuses_template_with_value_in_other_case(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put("Summarize AAPL cash flow", tasks("Fetch AAPL cash flow", "Compare aapl against peers"))
+
+    assert cache.get("Summarize MSFT cash flow") is None
+
+
+def test_period_is_substituted_case_insensitively(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put("Show quarterly revenue for AAPL", tasks("Fetch Quarterly income statements for AAPL"))
+
+    assert descriptions(cache.get("Show annual revenue for MSFT")) == ["Fetch annual income statements for MSFT"]
+
+
+def test_refuses_template_missing_period_or_year(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put("Show annual revenue for AAPL", tasks("Fetch income statements for AAPL"))
+    cache.put("Show AAPL revenue in 2022", tasks("Fetch income statements for AAPL"))
+
+    assert cache.get("Show quarterly revenue for MSFT") is None
+    assert cache.get("Show MSFT revenue in 2020") is None
+
+
+def test_ratios_and_ratings_are_not_tickers():
+    _, values = normalize_query("Is AAPL a BUY at a P/E of 30?")
+
+    assert values["T"] == ["AAPL"]
+
+
+def test_dollar_prefix_allows_single_letter_tickers():
+    _, values = normalize_query("How did $F and GM do?")
+
+    assert values["T"] == ["F", "GM"]
+
+
+def test_follow_ups_depend_on_context():
+    assert depends_on_context("compare that to MSFT")
+    assert depends_on_context("what about the margins?")
+    assert not depends_on_context("Compare NVDA and AMD margins in 2021")
+
+
+def test_refuses_template_with_tickers_the_planner_added(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put("Compare AAPL to its peers", tasks("Fetch income statements for AAPL, MSFT and GOOGL"))
+
+    assert cache.get("Compare NVDA to its peers") is None
+
+
+def test_refuses_template_with_absolute_dates(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put("How did TSLA stock do last week", tasks("Fetch daily TSLA prices from 2026-10-12 to 2026-10-16"))
+    cache.put("How did TSLA stock do in 2026", tasks("Fetch daily TSLA prices from 2026-10-12 to 2026-10-16"))
+
+    assert cache.get("How did AMD stock do last week") is None
+    assert cache.get("How did AMD stock do in 2025") is None
+
+
+def test_entries_expire_and_persist_with_version(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put("Show AAPL margins", tasks("Fetch AAPL income statements"))
+
+    assert make_cache(tmp_path).get("Show MSFT margins") is not None
+    assert PlanCache(path=str(tmp_path / "plan_cache.json"), ttl=0).get("Show MSFT margins") is None
+
+
+def test_discards_files_from_another_version(tmp_path):
+    path = tmp_path / "plan_cache.json"
+    path.write_text(json.dumps({"show {T0} margins": [{"id": 1, "description": "Fetch {T0} data"}]}))
+
+    assert PlanCache(path=str(path)).get("Show MSFT margins") is None
@@ -0,0 +1,104 @@
+import pytest
+
+from tafin import price_store
+from tafin.price_store import PriceStore
+
+
+def daily_payload(days, close="1.5"):
+    return {
+        "Meta Data": {"2. Symbol": "IBM"},
+        "Time Series (Daily)": {
+            f"2024-01-{day:02d}": {"1. open": "1.0", "2. high": "2.0", "3. low": "0.5", "4. close": close, "5. volume": "100"}
+            for day in days
+        },
+    }
+
+
+class FakeAPI:
+    """Serves queued payloads per outputsize and records what was requested."""
+
+    def __init__(self, **payloads):
+        self.payloads = {size: list(queue) for size, queue in payloads.items()}
+        self.requested = []
+
+    def __call__(self, params):
+        self.requested.append(params["outputsize"])
+        return self.payloads[params["outputsize"]].pop(0)
+
+
+@pytest.fixture
+def always_stale(monkeypatch):
+    monkeypatch.setattr(price_store, "DEFAULT_REFRESH_SECONDS", -1)
+
+
+def test_seeds_from_compact_when_full_history_is_unavailable(tmp_path):
+    requested = []
+
+    def fetch(params):
+        requested.append(params["outputsize"])
+        if params["outputsize"] == "full":
+            return {"Information": "outputsize=full is a premium feature."}
+        return daily_payload([2, 3, 4])
+
+    store = PriceStore(fetch, root=str(tmp_path))
+    response = store.query("TIME_SERIES_DAILY", "IBM")
+
+    assert requested == ["full", "compact"]
+    assert list(response["Time Series (Daily)"]) == ["2024-01-04", "2024-01-03", "2024-01-02"]
+    assert len(store.load("TIME_SERIES_DAILY", "IBM")) == 3
+
+
+def closes(store):
+    return [float(close) for close in store.load("TIME_SERIES_DAILY", "IBM")["close"]]
+
+
+def test_refresh_overwrites_the_overlapping_bar_and_appends_newer_ones(tmp_path, always_stale):
+    api = FakeAPI(full=[daily_payload([2, 3, 4])], compact=[daily_payload([3, 4, 5, 6], close="2.5")])
+    store = PriceStore(api, root=str(tmp_path))
+    store.query("TIME_SERIES_DAILY", "IBM")
+
+    response = store.query("TIME_SERIES_DAILY", "IBM")
+
+    assert api.requested == ["full", "compact"]
+    assert closes(store) == [1.5, 1.5, 2.5, 2.5, 2.5]
+    assert list(response["Time Series (Daily)"])[:2] == ["2024-01-06", "2024-01-05"]
+
+
+def test_gap_after_stored_history_triggers_a_full_reload(tmp_path, always_stale):
+    api = FakeAPI(
+        full=[daily_payload([2, 3]), daily_payload(range(2, 21), close="3.0")],
+        compact=[daily_payload([10, 11, 12])],
+    )
+    store = PriceStore(api, root=str(tmp_path))
+    store.query("TIME_SERIES_DAILY", "IBM")
+
+    store.query("TIME_SERIES_DAILY", "IBM")
+
+    assert api.requested == ["full", "compact", "full"]
+    assert closes(store) == [3.0] * 19
+
+
+def test_date_range_end_is_inclusive(tmp_path):
+    store = PriceStore(FakeAPI(full=[daily_payload(range(2, 11))]), root=str(tmp_path))
+
+    response = store.query("TIME_SERIES_DAILY", "IBM", start="2024-01-04", end="2024-01-06")
+
+    assert list(response["Time Series (Daily)"]) == ["2024-01-06", "2024-01-05", "2024-01-04"]
+
+
+def test_intraday_bars_keep_their_time_of_day(tmp_path):
+    payload = {
+        "Meta Data": {"2. Symbol": "IBM", "4. Interval": "5min"},
+        "Time Series (5min)": {
+            f"2024-01-02 09:{minute:02d}:00": {"1. open": "1", "2. high": "1", "3. low": "1", "4. close": "1", "5. volume": "7"}
+            for minute in (30, 35, 40)
+        },
+    }
+    store = PriceStore(FakeAPI(full=[payload]), root=str(tmp_path))
+
+    response = store.query("TIME_SERIES_INTRADAY", "IBM", interval="5min", end="2024-01-02 09:35:00")
+
+    assert response["Time Series (5min)"] == {
+        "2024-01-02 09:35:00": {"1. open": "1.0000", "2. high": "1.0000", "3. low": "1.0000", "4. close": "1.0000", "5. volume": "7"},
+        "2024-01-02 09:30:00": {"1. open": "1.0000", "2. high": "1.0000", "3. low": "1.0000", "4. close": "1.0000", "5. volume": "7"},
+    }
@@ -0,0 +1,108 @@
+import ast
+import os
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from tafin.screener import Screener, _CriteriaEvaluator, _normalize_criteria
+
+
+def evaluate(criteria, **columns):
+    evaluator = _CriteriaEvaluator({name: np.array(values, dtype=float) for name, values in columns.items()})
+    return np.asarray(evaluator.evaluate(ast.parse(_normalize_criteria(criteria), mode="eval"))).tolist()
+
+
+@pytest.mark.parametrize(
+    "criteria",
+    ["__import__('os').system('true')", "revenue.real > 0", "revenue in (1, 2)", "revenue is None", "[revenue]", "'a' > 1"],
+)
+def test_rejects_unsupported_nodes(criteria):
+    with pytest.raises(ValueError):
+        evaluate(criteria, revenue=[1.0])
+
+
+def test_rejects_unknown_and_internal_columns():
+    with pytest.raises(ValueError):
+        evaluate("price > 1", revenue=[1.0])
+    with pytest.raises(ValueError):
+        evaluate("revenue_prev > 1", revenue=[1.0], revenue_prev=[1.0])
+
+
+def test_chained_comparison():
+    assert evaluate("0.1 < roe <= 0.3", roe=[0.05, 0.2, 0.3, 0.4]) == [False, True, True, False]
+
+
+def test_normalizes_percent_upper_case_operators_and_single_equals():
+    assert _normalize_criteria("roe > 15% AND NOT eps_growth = 0 OR roa >= 2.5 %") == "roe > 0.15 and not eps_growth == 0 or roa >= 0.025"
+    assert evaluate("roe > 15% AND revenue = 2", roe=[0.2, 0.2, 0.1], revenue=[2, 3, 2]) == [True, False, False]
+
+
+def test_nan_never_compares_true():
+    assert evaluate("roe > 0.1 or roe <= 0.1", roe=[float("nan"), 0.2]) == [False, True]
+
+
+def statements(revenue):
+    return {
+        "income_statements": [{"report_period": "2024-12-31", "revenue": revenue, "net_income": revenue / 10}],
+        "balance_sheets": [{"report_period": "2024-12-31", "shareholders_equity": revenue / 2}],
+        "cash_flow_statements": [],
+    }
+
+
+def make_screener(tmp_path, revenues, gate):
+    def fetch(endpoint, params):
+        gate.wait(5)
+        kind = next(kind for kind in ("income_statements", "balance_sheets", "cash_flow_statements") if kind.split("_")[0] in endpoint)
+        return {kind: statements(revenues[params["ticker"]])[kind]}
+
+    return Screener(fetch, root=str(tmp_path))
+
+
+def open_gate():
+    gate = threading.Event()
+    gate.set()
+    return gate
+
+
+def test_missing_metric_never_matches_even_under_not(tmp_path):
+    screener = make_screener(tmp_path, {"AAA": 100.0, "BBB": 200.0}, open_gate())
+
+    result = screener.screen("not (fcf_margin > 0.5)", tickers=["AAA", "BBB"])
+
+    assert result["match_count"] == 0
+
+
+def test_stale_statements_are_served_while_refreshing_in_background(tmp_path):
+    gate = open_gate()
+    screener = make_screener(tmp_path, {"AAA": 100.0, "BBB": 200.0}, gate)
+    screener.screen("revenue > 0", tickers=["AAA", "BBB"])
+    old = time.time() - 2 * 24 * 3600
+    for ticker in ("AAA", "BBB"):
+        os.utime(screener._path(ticker), (old, old))
+    gate.clear()
+
+    started = time.monotonic()
+    result = screener.screen("revenue > 150", tickers=["AAA", "BBB"])
+
+    assert time.monotonic() - started < 1
+    assert [row["ticker"] for row in result["matches"]] == ["BBB"]
+    assert screener._refreshing == {"AAA", "BBB"}
+
+    gate.set()
+    deadline = time.monotonic() + 5
+    while screener._refreshing and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not screener._refreshing
+    assert screener._path("AAA").stat().st_mtime > old
+
+
+def test_tickers_without_statements_are_fetched_before_screening(tmp_path):
+    screener = make_screener(tmp_path, {"AAA": 100.0, "CCC": 300.0}, open_gate())
+    screener.screen("revenue > 0", tickers=["AAA"])
+
+    result = screener.screen("revenue > 150", tickers=["AAA", "CCC"])
+
+    assert [row["ticker"] for row in result["matches"]] == ["CCC"]
+    assert result["missing"] == []
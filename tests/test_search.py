@@ -0,0 +1,114 @@
+import pytest
+
+from tafin import tools
+from tafin.tools import SearchCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(tools.time, "monotonic", fake)
+    return fake
+
+
+def organic(*links):
+    return {"organic": [{"title": link, "link": link, "snippet": ""} for link in links]}
+
+
+@pytest.fixture
+def serper(monkeypatch):
+    """Record Serper batches and answer each query with the links registered for it."""
+    sent = []
+    answers = {}
+
+    def batch(queries, num_results):
+        sent.append(list(queries))
+        return [organic(*answers[query]) for query in queries]
+
+    monkeypatch.setattr(tools, "_serper_request", lambda query, num_results: batch([query], num_results)[0])
+    monkeypatch.setattr(tools, "_serper_batch_request", batch)
+    monkeypatch.setattr(tools, "search_cache", SearchCache())
+    return sent, answers
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = SearchCache(ttl=10)
+    cache.put("aapl news", 5, [{"link": "a"}])
+
+    clock.now += 5
+    assert cache.get("aapl news", 5) == [{"link": "a"}]
+    clock.now += 6
+    assert cache.get("aapl news", 5) is None
+
+
+def test_put_sweeps_expired_entries_and_bounds_size(clock):
+    cache = SearchCache(ttl=10, max_entries=2)
+    cache.put("old", 5, [])
+    clock.now += 11
+    cache.put("a", 5, [])
+    assert len(cache) == 1
+
+    cache.put("b", 5, [])
+    cache.get("a", 5)
+    cache.put("c", 5, [])
+    assert len(cache) == 2
+    assert cache.get("b", 5) is None
+    assert cache.get("a", 5) == []
+
+
+def test_normalized_queries_share_an_entry(clock):
+    cache = SearchCache()
+    cache.put("  AAPL   earnings? ", 5, [{"link": "a"}])
+
+    assert cache.get("aapl earnings", 5) == [{"link": "a"}]
+    assert cache.get("aapl earnings", 10) is None
+
+
+def test_returned_results_are_copies(clock):
+    cache = SearchCache()
+    results = [{"link": "a"}]
+    cache.put("q", 5, results)
+    results.append({"link": "b"})
+
+    first = cache.get("q", 5)
+    first[0]["link"] = "changed"
+    first.append({"link": "c"})
+
+    assert cache.get("q", 5) == [{"link": "a"}]
+
+
+def test_batch_dedupes_urls_and_sends_misses_once(serper):
+    sent, answers = serper
+    answers.update({"aapl earnings": ["https://x.com/a", "https://x.com/b"], "aapl guidance": ["https://X.com/a/#top", "https://x.com/c"]})
+
+    result = tools.web_search_batch.invoke({"queries": ["aapl earnings", "AAPL earnings?", "aapl guidance"]})
+
+    assert sent == [["aapl earnings", "aapl guidance"]]
+    assert [item["link"] for item in result["results"]] == ["https://x.com/a", "https://x.com/b", "https://x.com/c"]
+    assert result["results"][0]["queries"] == ["aapl earnings", "AAPL earnings?", "aapl guidance"]
+
+    tools.web_search_batch.invoke({"queries": ["aapl guidance"]})
+    assert len(sent) == 1
+
+
+def test_short_batch_response_is_an_error(monkeypatch):
+    class Response:
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return [organic("https://x.com/a")]
+
+    monkeypatch.setattr(tools, "serper_api_key", "key")
+    monkeypatch.setattr(tools.requests, "post", lambda *args, **kwargs: Response())
+
+    with pytest.raises(ValueError, match="1 results for a batch of 2"):
+        tools._serper_batch_request(["a", "b"], 5)
@@ -0,0 +1,44 @@
+from tafin.session import Session
+
+
+def test_context_skips_oversized_newest_record():
+    session = Session(context_bytes=200)
+    session.add_turn("How did AAPL do?", "Revenue grew.")
+    session.put("alpha_vantage_query", {"symbol": "AAPL"}, {"bars": "x" * 1000})
+
+    context = session.context()
+
+    assert [item.text for item in context] == [session.turns[0].text]
+
+
+def test_record_size_matches_text_bytes_without_building_it():
+    payload = {"name": "Société Générale", "bars": [{"close": 1.5, "volume": 10}, None, True], 3: ("a", "b")}
+    session = Session()
+
+    record = session.put("web_search", {"query": "ünïcode"}, payload)
+
+    assert record._text is None
+    assert record.size == len(record.text.encode())
+    assert session.size == record.size
+
+
+def test_preview_renders_only_the_start_of_the_payload():
+    session = Session()
+    record = session.put("alpha_vantage_query", {"symbol": "IBM"}, {"bars": list(range(10_000))})
+
+    preview = record.preview()
+
+    assert record._text is None
+    assert preview == ('{"bars":[' + ",".join(map(str, range(10_000))))[:100]
+
+
+def test_record_keeps_only_text_once_built():
+    session = Session()
+    record = session.put("web_search", {"query": "aapl"}, {"results": ["a" * 50]})
+    size = record.size
+
+    text = record.text
+
+    assert record.result is None
+    assert record.size == size == len(text.encode())
+    assert record.preview(12) == '{"results":['